@@ -0,0 +1,104 @@
+from django.db.models.signals import (m2m_changed, post_delete, post_init,
+                                      post_save)
+
+from api.v1.authentication import user_cache
+from api.v1.autocomplete import KINDS, index
+from api.v1.cache import bump_version
+from api.v1.leaderboards import update_leaderboards
+from api.v1.revocation import is_demotion, revocation_list
+from reviews.models import (Category, Comment, Genre, GenreTitle, Review,
+                            Title, User)
+from reviews.counters import comment_counts_rebuilt
+from reviews.purge import title_purged
+from reviews.ratings import rating_changed, ratings_rebuilt
+
+RESOURCES = {
+    Title: ("title", "leaderboard"),
+    GenreTitle: ("title", "leaderboard"),
+    Review: ("title", "review"),
+    Comment: ("comment",),
+    Genre: ("genre", "leaderboard"),
+    Category: ("category", "leaderboard"),
+    User: ("user",),
+}
+
+
+def invalidate_resource(sender, **kwargs):
+    for resource in RESOURCES[sender]:
+        bump_version(resource)
+
+
+for model in RESOURCES:
+    post_save.connect(invalidate_resource, sender=model)
+    post_delete.connect(invalidate_resource, sender=model)
+m2m_changed.connect(invalidate_resource, sender=Title.genre.through)
+
+
+def rating_updated(sender, title_id, **kwargs):
+    update_leaderboards(title_id)
+
+
+rating_changed.connect(rating_updated)
+
+
+def invalidate_ratings(sender, **kwargs):
+    bump_version("title")
+    bump_version("leaderboard")
+
+
+def invalidate_reviews(sender, **kwargs):
+    bump_version("review")
+    bump_version("comment")
+
+
+ratings_rebuilt.connect(invalidate_ratings)
+comment_counts_rebuilt.connect(invalidate_reviews)
+title_purged.connect(invalidate_reviews)
+
+
+def autocomplete_saved(sender, instance, **kwargs):
+    index.refresh(sender, instance)
+
+
+def autocomplete_deleted(sender, instance, **kwargs):
+    index.refresh(sender, instance, deleted=True)
+
+
+for model in KINDS:
+    post_save.connect(autocomplete_saved, sender=model)
+    post_delete.connect(autocomplete_deleted, sender=model)
+
+
+def remember_access(instance):
+    instance._loaded_access = tuple(
+        instance.__dict__.get(field)
+        for field in ("role", "is_active", "is_hidden")
+    )
+
+
+def user_loaded(sender, instance, **kwargs):
+    remember_access(instance)
+
+
+def user_saved(sender, instance, created, **kwargs):
+    user_cache.evict(instance.pk)
+    role, was_active, was_hidden = instance._loaded_access
+    # Кэш пользователей других процессов об этом не узнает, поэтому
+    # доступ отнимается через список отзыва.
+    lost_access = (
+        was_active and not instance.is_active
+        or was_hidden is False and instance.is_hidden
+    )
+    if not created and (lost_access or is_demotion(role, instance.role)):
+        revocation_list.revoke(instance.pk)
+    remember_access(instance)
+
+
+def user_deleted(sender, instance, **kwargs):
+    user_cache.evict(instance.pk)
+    revocation_list.revoke(instance.pk)
+
+
+post_init.connect(user_loaded, sender=User)
+post_save.connect(user_saved, sender=User)
+post_delete.connect(user_deleted, sender=User)
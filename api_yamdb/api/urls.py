@@ -2,8 +2,8 @@ from django.urls import include, path
 from rest_framework.routers import DefaultRouter
 
 from api.v1.views import (CategoryViewSet, CommentViewSet, GenreViewSet,
-                          ReviewViewSet, TitleViewSet, UserViewSet, signup,
-                          token)
+                          ReviewViewSet, TitleViewSet, UserViewSet,
+                          autocomplete, signup, token)
 
 router_v1 = DefaultRouter()
 
@@ -26,5 +26,6 @@ auth_patterns = [
 
 urlpatterns = [
     path("v1/", include(auth_patterns)),
+    path("v1/autocomplete/", autocomplete, name="autocomplete"),
     path("v1/", include(router_v1.urls)),
 ]
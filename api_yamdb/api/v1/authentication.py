@@ -0,0 +1,99 @@
+import copy
+import threading
+import time
+from collections import OrderedDict
+
+from django.conf import settings
+from rest_framework.exceptions import AuthenticationFailed
+from rest_framework_simplejwt.authentication import JWTAuthentication
+from rest_framework_simplejwt.settings import api_settings
+from rest_framework_simplejwt.tokens import AccessToken
+
+from api.v1.revocation import revocation_list
+
+TOKEN_REVOKED_MESSAGE = "Токен отозван"
+
+
+class UserCache:
+    """Ограниченный LRU-кэш пользователей процесса по id.
+
+    Записи живут не дольше AUTH_USER_CACHE_TIMEOUT секунд: изменения,
+    сделанные другими процессами, становятся видны не позже этого срока,
+    а изменения этого процесса сбрасывают запись сразу через сигналы.
+    """
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.entries = OrderedDict()
+
+    def get(self, user_id):
+        with self.lock:
+            entry = self.entries.get(user_id)
+            if entry is None:
+                return None
+            user, expires = entry
+            if expires < time.monotonic():
+                del self.entries[user_id]
+                return None
+            self.entries.move_to_end(user_id)
+            return user
+
+    def set(self, user_id, user):
+        with self.lock:
+            self.entries[user_id] = (
+                user, time.monotonic() + settings.AUTH_USER_CACHE_TIMEOUT
+            )
+            self.entries.move_to_end(user_id)
+            while len(self.entries) > settings.AUTH_USER_CACHE_SIZE:
+                self.entries.popitem(last=False)
+
+    def evict(self, user_id):
+        with self.lock:
+            self.entries.pop(user_id, None)
+
+    def clear(self):
+        with self.lock:
+            self.entries.clear()
+
+
+user_cache = UserCache()
+
+
+def issue_access_token(user):
+    token = AccessToken.for_user(user)
+    token["username"] = user.username
+    token["role"] = user.role
+    # Дробная метка времени отличает токен, выпущенный сразу после отзыва,
+    # от отозванного в ту же секунду.
+    token["iat"] = time.time()
+    return token
+
+
+def issued_at(validated_token):
+    if "iat" in validated_token:
+        return validated_token["iat"]
+    return (
+        validated_token["exp"]
+        - api_settings.ACCESS_TOKEN_LIFETIME.total_seconds()
+    )
+
+
+class CachedJWTAuthentication(JWTAuthentication):
+    """JWT-аутентификация без запроса к таблице пользователей на каждый вызов.
+
+    Пользователь берётся из `user_cache`, а из базы загружается только при
+    промахе. Каждый запрос получает свою копию, чтобы изменения
+    `request.user` не попадали в общий кэш. Токены, выпущенные до отзыва
+    токенов пользователя, отклоняются.
+    """
+
+    def get_user(self, validated_token):
+        user_id = validated_token.get(api_settings.USER_ID_CLAIM)
+        if revocation_list.is_revoked(user_id, issued_at(validated_token)):
+            raise AuthenticationFailed(TOKEN_REVOKED_MESSAGE,
+                                       code="token_revoked")
+        user = user_cache.get(user_id)
+        if user is None:
+            user = super().get_user(validated_token)
+            user_cache.set(user_id, user)
+        return copy.copy(user)
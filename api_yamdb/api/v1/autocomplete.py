@@ -0,0 +1,110 @@
+import threading
+import time
+from bisect import bisect_left, insort
+
+from django.conf import settings
+
+from api.v1.cache import bump_version, versions_token
+from reviews.models import Category, Genre, Title
+
+TITLE = "title"
+GENRE = "genre"
+CATEGORY = "category"
+KINDS = {Title: TITLE, Genre: GENRE, Category: CATEGORY}
+
+
+class PrefixIndex:
+    """Отсортированный список ключей для поиска по началу слова.
+
+    Каждое слово названия даёт ключ «хвост названия с этого слова», так
+    что «ореш» находит «Крепкий орешек». Индекс живёт в памяти процесса и
+    строится при первом запросе; записи этого процесса применяются к нему
+    сразу, а записи других процессов замечаются по версии ресурса
+    `autocomplete` в общем кэше, и тогда индекс перестраивается. Кэш
+    процесса (LocMemCache) других процессов не видит, поэтому индекс
+    также перестраивается, если он старше AUTOCOMPLETE_MAX_AGE секунд.
+    """
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.keys = None
+        self.entries = {}
+        self.version = None
+        self.loaded_at = None
+
+    @staticmethod
+    def make_keys(name):
+        name = name.lower()
+        starts = [0] + [
+            pos + 1 for pos, char in enumerate(name[:-1])
+            if not char.isalnum() and name[pos + 1].isalnum()
+        ]
+        return {name[start:] for start in starts}
+
+    def add(self, kind, ident, name):
+        keys = [(key, kind, ident) for key in self.make_keys(name)]
+        self.entries[(kind, ident)] = (name, keys)
+        return keys
+
+    def remove(self, kind, ident):
+        _, keys = self.entries.pop((kind, ident), (None, ()))
+        for key in keys:
+            pos = bisect_left(self.keys, key)
+            if pos < len(self.keys) and self.keys[pos] == key:
+                del self.keys[pos]
+
+    def load(self):
+        keys, self.entries = [], {}
+        self.version = versions_token(("autocomplete",))
+        self.loaded_at = time.monotonic()
+        for model, kind in KINDS.items():
+            objects = model.objects.all()
+            if model is Title:
+                objects = objects.filter(is_hidden=False)
+            for ident, name in objects.values_list("pk", "name"):
+                keys.extend(self.add(kind, ident, name))
+        keys.sort()
+        self.keys = keys
+
+    def is_stale(self):
+        return (
+            self.keys is None
+            or time.monotonic() - self.loaded_at
+            > settings.AUTOCOMPLETE_MAX_AGE
+            or self.version != versions_token(("autocomplete",))
+        )
+
+    def search(self, prefix, limit):
+        prefix = prefix.lower().strip()
+        with self.lock:
+            if self.is_stale():
+                self.load()
+            if not prefix:
+                return []
+            found = {}
+            pos = bisect_left(self.keys, (prefix,))
+            while pos < len(self.keys) and len(found) < limit:
+                key, kind, ident = self.keys[pos]
+                if not key.startswith(prefix):
+                    break
+                found.setdefault((kind, ident), self.entries[(kind, ident)][0])
+                pos += 1
+        return [
+            {"type": kind, "id": ident, "name": name}
+            for (kind, ident), name in found.items()
+        ]
+
+    def refresh(self, model, instance, deleted=False):
+        with self.lock:
+            bump_version("autocomplete")
+            if self.keys is None:
+                return
+            kind = KINDS[model]
+            self.remove(kind, instance.pk)
+            if not deleted and not getattr(instance, "is_hidden", False):
+                for key in self.add(kind, instance.pk, instance.name):
+                    insort(self.keys, key)
+            self.version = versions_token(("autocomplete",))
+
+
+index = PrefixIndex()
@@ -0,0 +1,76 @@
+import hashlib
+import time
+from urllib.parse import urlencode
+
+from django.conf import settings
+from django.core.cache import cache
+from rest_framework.response import Response
+
+VERSION_KEY = "version:{}"
+RESPONSE_KEY = "response:{}:{}"
+
+
+def new_version():
+    return time.time_ns()
+
+
+def get_versions(resources):
+    """Текущие версии ресурсов; отсутствующие заводятся заново."""
+    keys = [VERSION_KEY.format(resource) for resource in resources]
+    versions = cache.get_many(keys)
+    for key in keys:
+        if key not in versions:
+            cache.add(key, new_version(), None)
+            versions[key] = cache.get(key)
+    return [versions[key] for key in keys]
+
+
+def versions_token(resources):
+    return ".".join(str(version) for version in get_versions(resources))
+
+
+def bump_version(resource):
+    key = VERSION_KEY.format(resource)
+    try:
+        cache.incr(key)
+    except ValueError:
+        # Ключ вытеснен: новая версия не должна совпасть ни с одной старой.
+        cache.set(key, new_version(), None)
+
+
+def response_cache_key(request, resources):
+    # Ссылки `next` и `previous` в ответе абсолютные, поэтому в ключ входят
+    # схема и хост запроса.
+    query = urlencode(sorted(request.query_params.lists()), doseq=True)
+    url = request.build_absolute_uri(request.path)
+    digest = hashlib.md5(f"{url}?{query}".encode("utf-8")).hexdigest()
+    return RESPONSE_KEY.format(versions_token(resources), digest)
+
+
+class CachedResponseMixin:
+    """Кэширует ответы на GET-запросы анонимных пользователей.
+
+    Ключ строится из пути, нормализованной строки запроса и версий
+    ресурсов из `cache_resources`; запись в любую из связанных моделей
+    поднимает версию, и старые ответы просто перестают запрашиваться.
+    """
+
+    cache_resources = ()
+
+    def get_cache_resources(self):
+        return self.cache_resources
+
+    def cached_response(self, handler, request, *args, **kwargs):
+        if request.user.is_authenticated:
+            return handler(request, *args, **kwargs)
+        key = response_cache_key(request, self.get_cache_resources())
+        data = cache.get(key)
+        if data is not None:
+            return Response(data)
+        response = handler(request, *args, **kwargs)
+        if response.status_code == 200:
+            cache.set(key, response.data, settings.RESPONSE_CACHE_TIMEOUT)
+        return response
+
+    def list(self, request, *args, **kwargs):
+        return self.cached_response(super().list, request, *args, **kwargs)
@@ -0,0 +1,56 @@
+from django.db.models import Count, F
+
+from reviews.models import GenreTitle, Title
+
+DECADE = 10
+
+
+def genre_facet(title_ids):
+    rows = (
+        GenreTitle.objects.filter(title__in=title_ids)
+        .values("genre")
+        .annotate(count=Count("title", distinct=True))
+        .order_by("-count", "genre")
+    )
+    return [{"slug": row["genre"], "count": row["count"]} for row in rows]
+
+
+def category_facet(title_ids):
+    rows = (
+        Title.objects.filter(pk__in=title_ids, category__isnull=False)
+        .values("category")
+        .annotate(count=Count("pk"))
+        .order_by("-count", "category")
+    )
+    return [{"slug": row["category"], "count": row["count"]} for row in rows]
+
+
+def year_facet(title_ids):
+    rows = (
+        Title.objects.filter(pk__in=title_ids)
+        .values(decade=F("year") / DECADE * DECADE)
+        .annotate(count=Count("pk"))
+        .order_by("decade")
+    )
+    return [
+        {"from": row["decade"], "to": row["decade"] + DECADE - 1,
+         "count": row["count"]}
+        for row in rows
+    ]
+
+
+FACETS = {
+    "genre": genre_facet,
+    "category": category_facet,
+    "year": year_facet,
+}
+
+
+def get_facets(queryset, names):
+    """Счётчики по жанрам, категориям и десятилетиям для выборки.
+
+    Каждый фасет — один GROUP BY по подзапросу id отфильтрованных
+    произведений.
+    """
+    title_ids = queryset.order_by().values("pk")
+    return {name: FACETS[name](title_ids) for name in names if name in FACETS}
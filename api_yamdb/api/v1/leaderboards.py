@@ -0,0 +1,115 @@
+from bisect import insort
+
+from django.conf import settings
+from django.core.cache import cache
+
+from api.v1.cache import bump_version, versions_token
+from reviews.models import GenreTitle, Title
+
+LEADERBOARD_KEY = "leaderboard:{}:{}:{}"
+LOCK_KEY = "lock:{}"
+LOCK_TIMEOUT = 10
+GENRE = "genre"
+CATEGORY = "category"
+
+
+def leaderboard_key(kind, slug):
+    return LEADERBOARD_KEY.format(versions_token(("leaderboard",)), kind, slug)
+
+
+def qualifies(rating, review_count):
+    return (
+        rating is not None
+        and review_count >= settings.LEADERBOARD_MIN_VOTES
+    )
+
+
+def build_leaderboard(kind, slug):
+    """Лучшие произведения жанра или категории по хранимому рейтингу."""
+    titles = Title.objects.filter(
+        review_count__gte=settings.LEADERBOARD_MIN_VOTES,
+        rating__isnull=False,
+        is_hidden=False,
+    )
+    if kind == GENRE:
+        titles = titles.filter(
+            pk__in=GenreTitle.objects.filter(genre=slug).values("title")
+        )
+    else:
+        titles = titles.filter(category=slug)
+    return [
+        (-rating, pk) for pk, rating in titles.order_by("-rating", "id")
+        .values_list("pk", "rating")[:settings.LEADERBOARD_SIZE]
+    ]
+
+
+def get_leaderboard(kind, slug):
+    """Возвращает id произведений в порядке рейтинга."""
+    key = leaderboard_key(kind, slug)
+    board = cache.get(key)
+    if board is None:
+        board = build_leaderboard(kind, slug)
+        cache.set(key, board, settings.LEADERBOARD_TIMEOUT)
+    return [pk for _, pk in board]
+
+
+def update_leaderboards(title_id):
+    """Переставляет произведение в уже построенных таблицах лидеров.
+
+    Таблица хранит min(LEADERBOARD_SIZE, число подходящих произведений)
+    лучших записей. Если произведение ушло вниз из полной таблицы, замену
+    без запроса к базе не найти, и таблица удаляется до следующего чтения.
+
+    Чтение и запись таблицы идут под блокировкой в кэше. Если таблицу уже
+    переставляет другой запрос, его изменение могло бы затереть наше,
+    поэтому версия таблиц лидеров поднимается и все они строятся заново.
+    """
+    row = Title.objects.filter(pk=title_id).values(
+        "category_id", "rating", "review_count", "is_hidden"
+    ).first()
+    if row is None:
+        return
+    keys = [
+        leaderboard_key(GENRE, slug) for slug in GenreTitle.objects.filter(
+            title=title_id
+        ).values_list("genre_id", flat=True)
+    ]
+    if row["category_id"] is not None:
+        keys.append(leaderboard_key(CATEGORY, row["category_id"]))
+    new_entry = None
+    if not row["is_hidden"] and qualifies(row["rating"],
+                                          row["review_count"]):
+        new_entry = (-row["rating"], title_id)
+    locks = [LOCK_KEY.format(key) for key in keys]
+    acquired = [lock for lock in locks if cache.add(lock, 1, LOCK_TIMEOUT)]
+    try:
+        if len(acquired) < len(locks):
+            bump_version("leaderboard")
+            return
+        move_entry(keys, title_id, new_entry)
+    finally:
+        cache.delete_many(acquired)
+
+
+def move_entry(keys, title_id, new_entry):
+    """Переставляет запись произведения в таблицах с ключами `keys`."""
+    size = settings.LEADERBOARD_SIZE
+    changed, stale = {}, []
+    for key, board in cache.get_many(keys).items():
+        old_entry = next((entry for entry in board if entry[1] == title_id),
+                         None)
+        entries = [entry for entry in board if entry[1] != title_id]
+        if new_entry is not None:
+            insort(entries, new_entry)
+        entries = entries[:size]
+        # За пределами полной таблицы могут быть произведения лучше того,
+        # которое опустилось на последнее место или выбыло.
+        if old_entry is not None and len(board) >= size and (
+            new_entry is None
+            or new_entry > old_entry and new_entry not in entries[:-1]
+        ):
+            stale.append(key)
+        else:
+            changed[key] = entries
+    cache.set_many(changed, settings.LEADERBOARD_TIMEOUT)
+    cache.delete_many(stale)
@@ -0,0 +1,98 @@
+import hashlib
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db.models import QuerySet
+from rest_framework.pagination import CursorPagination, LimitOffsetPagination
+
+from api.v1.cache import versions_token
+
+COUNT_KEY = "count:{}:{}"
+LAST_COUNT_KEY = "count:last:{}"
+
+
+class CachedCountPagination(LimitOffsetPagination):
+    """limit/offset, где COUNT(*) берётся из кэша.
+
+    Ключ — SQL запроса и версии ресурсов `cache_resources` вьюсета, так что
+    запись в связанные модели сбрасывает счётчик. Если задан
+    `PAGINATION_COUNT_ESTIMATE_THRESHOLD`, то после сброса большие
+    счётчики (не меньше порога) отдаются по последнему известному
+    значению с флагом `count_estimated` до истечения
+    `PAGINATION_COUNT_TIMEOUT`.
+    """
+
+    def paginate_queryset(self, queryset, request, view=None):
+        self.view = view
+        self.count_estimated = False
+        return super().paginate_queryset(queryset, request, view)
+
+    def get_count(self, queryset):
+        resources = getattr(self.view, "cache_resources", ())
+        if not resources or not isinstance(queryset, QuerySet):
+            return super().get_count(queryset)
+        digest = hashlib.md5(str(queryset.query).encode("utf-8")).hexdigest()
+        key = COUNT_KEY.format(versions_token(resources), digest)
+        count = cache.get(key)
+        if count is not None:
+            return count
+        threshold = settings.PAGINATION_COUNT_ESTIMATE_THRESHOLD
+        if threshold is not None:
+            last_count = cache.get(LAST_COUNT_KEY.format(digest))
+            if last_count is not None and last_count >= threshold:
+                self.count_estimated = True
+                return last_count
+        count = super().get_count(queryset)
+        cache.set(key, count, settings.PAGINATION_COUNT_TIMEOUT)
+        cache.set(
+            LAST_COUNT_KEY.format(digest), count,
+            settings.PAGINATION_COUNT_TIMEOUT
+        )
+        return count
+
+    def get_paginated_response(self, data):
+        response = super().get_paginated_response(data)
+        if self.count_estimated:
+            response.data["count_estimated"] = True
+        return response
+
+
+class ViewOrderingCursorPagination(CursorPagination):
+    """Курсор всегда идёт по `cursor_ordering`, а не по `?ordering=`."""
+
+    def get_ordering(self, request, queryset, view):
+        return self.ordering
+
+
+class OptionalCursorPagination(CachedCountPagination):
+    """limit/offset по умолчанию и курсор, если передан параметр `cursor`.
+
+    Первая страница запрашивается с пустым `?cursor=`, дальше клиент
+    идёт по ссылкам `next`/`previous`. Порядок задаётся атрибутом
+    `cursor_ordering` вьюсета и должен опираться на индекс; `?ordering=`
+    в этом режиме не действует.
+    """
+
+    cursor_query_param = "cursor"
+    max_cursor_page_size = 100
+
+    def get_cursor_paginator(self, view):
+        paginator = ViewOrderingCursorPagination()
+        paginator.ordering = view.cursor_ordering
+        paginator.page_size_query_param = self.limit_query_param
+        paginator.max_page_size = self.max_cursor_page_size
+        return paginator
+
+    def paginate_queryset(self, queryset, request, view=None):
+        self.cursor_paginator = None
+        if self.cursor_query_param not in request.query_params:
+            return super().paginate_queryset(queryset, request, view)
+        self.cursor_paginator = self.get_cursor_paginator(view)
+        return self.cursor_paginator.paginate_queryset(
+            queryset, request, view
+        )
+
+    def get_paginated_response(self, data):
+        if self.cursor_paginator is not None:
+            return self.cursor_paginator.get_paginated_response(data)
+        return super().get_paginated_response(data)
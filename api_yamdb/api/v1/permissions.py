@@ -1,29 +1,56 @@
 from rest_framework import permissions
 
 
+class RoleContext:
+    """Роль пользователя запроса, вычисленная один раз."""
+
+    __slots__ = ("user_id", "is_authenticated", "is_admin", "is_moderator")
+
+    def __init__(self, user):
+        self.is_authenticated = bool(user and user.is_authenticated)
+        self.user_id = user.pk if self.is_authenticated else None
+        self.is_admin = self.is_authenticated and user.is_admin
+        self.is_moderator = self.is_authenticated and user.is_moderator
+
+    def can_edit(self, author_id):
+        return self.is_admin or self.is_moderator or (
+            self.is_authenticated and author_id == self.user_id
+        )
+
+
+def get_role_context(request):
+    context = getattr(request, "_role_context", None)
+    if context is None:
+        context = request._role_context = RoleContext(request.user)
+    return context
+
+
 class IsAdmin(permissions.BasePermission):
     def has_permission(self, request, view):
-        return request.user.is_authenticated and request.user.is_admin
+        return get_role_context(request).is_admin
 
 
 class IsAuthorModeratorAdminOrReadOnly(permissions.BasePermission):
+    def has_permission(self, request, view):
+        return (
+            request.method in permissions.SAFE_METHODS
+            or get_role_context(request).is_authenticated
+        )
+
     def has_object_permission(self, request, view, obj):
         if request.method in permissions.SAFE_METHODS:
             return True
 
+        role = get_role_context(request)
         if request.method == "POST":
-            return request.user.is_authenticated
+            return role.is_authenticated
 
-        return request.user.is_authenticated and (
-            request.user.is_moderator
-            or request.user.is_admin
-            or request.user == obj.author
-        )
+        return role.can_edit(obj.author_id)
 
 
 class ReadOnlyOrAdmin(permissions.BasePermission):
     def has_permission(self, request, view):
         return (
             request.method in permissions.SAFE_METHODS
-            or request.user.is_authenticated and request.user.is_admin
+            or get_role_context(request).is_admin
         )
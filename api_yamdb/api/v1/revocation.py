@@ -0,0 +1,83 @@
+import threading
+import time
+
+from django.conf import settings
+from django.utils import timezone
+from rest_framework_simplejwt.settings import api_settings
+
+from api.v1.cache import bump_version, versions_token
+from reviews.models import TokenRevocation, User
+
+ROLE_RANKS = {User.USER: 0, User.MODERATOR: 1, User.ADMIN: 2}
+
+
+class RevocationList:
+    """Отозванные токены: для каждого пользователя — момент отзыва.
+
+    Токены пользователя, выпущенные не позже этого момента, недействительны,
+    поэтому проверка — один поиск в словаре. Таблица отзывов только
+    дополняется: список читается целиком при первой проверке, а затем
+    дочитываются только новые строки — сразу, если версия ресурса
+    `revocation` в кэше изменилась, и в любом случае не реже раза в
+    TOKEN_REVOCATION_POLL_INTERVAL секунд. Опрос нужен потому, что кэш
+    процесса (LocMemCache) не видит отзывов, сделанных в других процессах.
+    Отзывы старше срока жизни токена не загружаются.
+    """
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.revoked = None
+        self.last_id = 0
+        self.version = None
+        self.polled_at = None
+
+    def add_rows(self, rows):
+        for row_id, user_id, revoked_at in rows:
+            self.revoked[user_id] = max(
+                self.revoked.get(user_id, 0), revoked_at.timestamp()
+            )
+            self.last_id = max(self.last_id, row_id)
+
+    def sync(self):
+        version = versions_token(("revocation",))
+        now = time.monotonic()
+        if (
+            self.revoked is not None
+            and version == self.version
+            and now - self.polled_at
+            < settings.TOKEN_REVOCATION_POLL_INTERVAL
+        ):
+            return
+        self.polled_at = now
+        if self.revoked is None:
+            self.revoked, self.last_id = {}, 0
+            rows = TokenRevocation.objects.filter(
+                revoked_at__gte=timezone.now()
+                - api_settings.ACCESS_TOKEN_LIFETIME
+            )
+        else:
+            rows = TokenRevocation.objects.filter(id__gt=self.last_id)
+        self.version = version
+        self.add_rows(rows.values_list("id", "user_id", "revoked_at"))
+
+    def is_revoked(self, user_id, issued_at):
+        with self.lock:
+            self.sync()
+            revoked_at = self.revoked.get(user_id)
+        return revoked_at is not None and issued_at <= revoked_at
+
+    def revoke(self, user_id):
+        TokenRevocation.objects.create(user_id=user_id)
+        bump_version("revocation")
+
+    def clear(self):
+        with self.lock:
+            self.revoked, self.last_id, self.version = None, 0, None
+            self.polled_at = None
+
+
+revocation_list = RevocationList()
+
+
+def is_demotion(old_role, new_role):
+    return ROLE_RANKS.get(new_role, 0) < ROLE_RANKS.get(old_role, 0)
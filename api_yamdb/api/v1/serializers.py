@@ -1,10 +1,16 @@
 import datetime as dt
 
-from django.contrib.auth.tokens import default_token_generator
+from django.contrib.auth.validators import UnicodeUsernameValidator
+from django.db import IntegrityError, transaction
+from django.db.models import Q, prefetch_related_objects
 from rest_framework import serializers
 
+from api.v1.permissions import get_role_context
+from api.v1.utils import make_confirmation_code, send_confirmation_code
+from reviews.confirmation import store_code
 from reviews.models import (Category, Comment, Genre, Review,
                             Title, User)
+from reviews.validators import custom_username_validator
 
 
 class UserSerializer(serializers.ModelSerializer):
@@ -21,14 +27,6 @@ class UserSerializer(serializers.ModelSerializer):
             "role",
         )
 
-    def create(self, validated_data):
-        confirmation_code = default_token_generator.make_token(
-            validated_data["user"]
-        )
-        return User.objects.create(
-            **validated_data, confirmation_code=confirmation_code
-        )
-
 
 class UserAdminSerializer(serializers.ModelSerializer):
     class Meta:
@@ -37,10 +35,58 @@ class UserAdminSerializer(serializers.ModelSerializer):
                   "last_name", "bio", "role")
 
 
+USERNAME_TAKEN_MESSAGE = "Пользователь с таким username уже существует"
+EMAIL_TAKEN_MESSAGE = "Пользователь с таким email уже существует"
+
+
 class SignUpSerializer(serializers.ModelSerializer):
+    """Регистрация или повторный запрос кода подтверждения.
+
+    Уникальность не проверяется отдельными запросами: `create` ищет
+    пользователя с той же парой username и email, а если такого нет —
+    создаёт его, и занятые поля отсекают ограничения уникальности. Код
+    хранится отдельно от пользователя, поэтому таблица пользователей при
+    повторной регистрации не меняется.
+    """
+
     class Meta:
         model = User
         fields = ("username", "email")
+        extra_kwargs = {
+            "username": {"validators": [UnicodeUsernameValidator(),
+                                        custom_username_validator]},
+            "email": {"validators": []},
+        }
+
+    def create(self, validated_data):
+        code = make_confirmation_code()
+        try:
+            with transaction.atomic():
+                user_id = User.objects.filter(
+                    **validated_data, is_hidden=False
+                ).values_list("pk", flat=True).first()
+                if user_id is None:
+                    user_id = User.objects.create(**validated_data).pk
+                store_code(user_id, code)
+        except IntegrityError:
+            raise serializers.ValidationError(
+                self.conflicts(**validated_data)
+            )
+        send_confirmation_code(validated_data["username"],
+                               validated_data["email"], code)
+        return User(**validated_data)
+
+    @staticmethod
+    def conflicts(username, email):
+        errors = {}
+        for taken in User.objects.filter(
+            Q(username=username) | Q(email=email)
+        ).values("username", "email"):
+            if taken["username"] == username:
+                errors["username"] = [USERNAME_TAKEN_MESSAGE]
+            if taken["email"] == email:
+                errors["email"] = [EMAIL_TAKEN_MESSAGE]
+        return errors
 
 
 class GetTokenSerializer(serializers.Serializer):
@@ -65,51 +111,64 @@ class GenreSerializer(serializers.ModelSerializer):
         fields = ("name", "slug")
 
 
-class ReviewSerializer(serializers.ModelSerializer):
-    author = serializers.SlugRelatedField(
-        read_only=True, slug_field="username")
+REVIEW_EXISTS_MESSAGE = "Вы уже писали отзыв к этому произведению"
 
-    class Meta:
-        fields = ("id", "text", "author", "score", "pub_date")
-        model = Review
 
-    def validate(self, data):
-        if self.context["request"].method != "POST":
-            return data
-        author = self.context["request"].user
-        title_id = self.context.get("view").kwargs.get("title_id")
-        if Review.objects.filter(title=title_id, author=author).exists():
-            raise serializers.ValidationError(
-                "Вы уже писали отзыв к этому произведению"
-            )
-        return data
+class AuthoredSerializer(serializers.ModelSerializer):
+    """Автор по username и признак `can_edit` для пользователя запроса.
 
+    `can_edit` сравнивает id автора с ролью, вычисленной один раз на
+    запрос, без объектных проверок прав для каждой строки.
+    """
 
-class CommentSerializer(serializers.ModelSerializer):
     author = serializers.SlugRelatedField(read_only=True,
                                           slug_field="username")
+    can_edit = serializers.SerializerMethodField()
+
+    def get_can_edit(self, obj):
+        request = self.context.get("request")
+        if request is None:
+            return False
+        return get_role_context(request).can_edit(obj.author_id)
+
 
+class ReviewSerializer(AuthoredSerializer):
     class Meta:
-        fields = fields = ("id", "text", "author", "pub_date")
-        model = Comment
+        fields = ("id", "text", "author", "score", "pub_date",
+                  "comment_count", "can_edit")
+        read_only_fields = ("comment_count",)
+        model = Review
 
 
-class TitleSerializer(serializers.ModelSerializer):
+class CommentSerializer(AuthoredSerializer):
+    class Meta:
+        fields = ("id", "text", "author", "pub_date", "can_edit")
+        model = Comment
 
-    genre = serializers.PrimaryKeyRelatedField(many=True,
-                                               queryset=Genre.objects.all())
-    category = serializers.PrimaryKeyRelatedField(
-        queryset=Category.objects.all())
-    rating = serializers.SerializerMethodField()
 
-    def get_rating(self, obj):
-        return self.context['view'].queryset.get(id=obj.id).rating
+class TitleReadSerializer(serializers.ModelSerializer):
+    genre = GenreSerializer(many=True, read_only=True)
+    category = CategorySerializer(read_only=True)
+    rating = serializers.FloatField(read_only=True)
 
     class Meta:
         model = Title
-        fields = ("id", "name", "year", "rating",
+        fields = ("id", "name", "year", "rating", "review_count",
                   "description", "genre", "category")
 
+
+class TitleWriteSerializer(serializers.ModelSerializer):
+    genre = serializers.SlugRelatedField(
+        many=True, slug_field="slug", queryset=Genre.objects.all()
+    )
+    category = serializers.SlugRelatedField(
+        slug_field="slug", queryset=Category.objects.all()
+    )
+
+    class Meta:
+        model = Title
+        fields = ("id", "name", "year", "description", "genre", "category")
+
     def validate_year(self, value):
         year = dt.date.today().year
         if value > year:
@@ -117,13 +176,8 @@ class TitleSerializer(serializers.ModelSerializer):
         return value
 
     def to_representation(self, instance):
-        rep = super().to_representation(instance)
-        category = rep.get('category')
-        if category:
-            catogeory_ob = Category.objects.get(pk=category)
-            rep['category'] = CategorySerializer(catogeory_ob).data
-        list_genre_ob = []
-        for genre in rep.get('genre'):
-            list_genre_ob.append(Genre.objects.get(pk=genre))
-        rep['genre'] = GenreSerializer(list_genre_ob, many=True).data
-        return rep
+        # Жанры перечитываются одним запросом: ответ совпадает с GET,
+        # даже если в запросе жанры повторялись или шли в другом порядке.
+        instance._prefetched_objects_cache = {}
+        prefetch_related_objects([instance], "genre")
+        return TitleReadSerializer(instance, context=self.context).data
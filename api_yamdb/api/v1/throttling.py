@@ -0,0 +1,133 @@
+import threading
+import time
+from collections import OrderedDict
+
+from django.conf import settings
+from django.core.cache import cache
+from rest_framework.settings import api_settings
+from rest_framework.throttling import BaseThrottle, SimpleRateThrottle
+
+THROTTLE_KEY = "throttle:{}:{}"
+
+
+class MemoryBucketStore:
+    """Корзины токенов в памяти процесса.
+
+    Под блокировкой выполняется только пересчёт одной корзины. Число
+    корзин ограничено THROTTLE_MAX_BUCKETS: вытесняется дольше всех не
+    использованная корзина, но только если она уже наполнилась — иначе
+    поток новых ключей сбрасывал бы чужие лимиты. Пока самая старая
+    корзина пополняется, запрос с новым ключом отклоняется.
+    """
+
+    timer = time.monotonic
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.buckets = OrderedDict()
+
+    def consume(self, key, capacity, rate):
+        now = self.timer()
+        with self.lock:
+            bucket = self.buckets.pop(key, None)
+            if bucket is None and (
+                len(self.buckets) >= settings.THROTTLE_MAX_BUCKETS
+            ):
+                oldest = next(iter(self.buckets))
+                if self.buckets[oldest][2] > now:
+                    return 1 / rate
+                del self.buckets[oldest]
+            tokens, updated, _ = bucket or (capacity, now, now)
+            tokens = min(capacity, tokens + (now - updated) * rate)
+            wait = 0 if tokens >= 1 else (1 - tokens) / rate
+            if not wait:
+                tokens -= 1
+            self.buckets[key] = (tokens, now, now + (capacity - tokens) / rate)
+        return wait
+
+    def clear(self):
+        with self.lock:
+            self.buckets.clear()
+
+
+class CacheBucketStore:
+    """Корзины токенов в общем кэше для нескольких процессов.
+
+    Чтение и запись корзины не атомарны, поэтому при одновременных
+    запросах лимит может быть немного превышен.
+    """
+
+    timer = time.time
+
+    def consume(self, key, capacity, rate):
+        now = self.timer()
+        tokens, updated = cache.get(key, (capacity, now))
+        tokens = min(capacity, tokens + (now - updated) * rate)
+        wait = 0 if tokens >= 1 else (1 - tokens) / rate
+        cache.set(key, (tokens - 1 if not wait else tokens, now),
+                  int(capacity / rate) + 1)
+        return wait
+
+    def clear(self):
+        pass
+
+
+memory_store = MemoryBucketStore()
+STORES = {"memory": memory_store, "cache": CacheBucketStore()}
+
+
+class TokenBucketThrottle(BaseThrottle):
+    """Корзина токенов: ёмкость и скорость пополнения задаёт ставка
+    `DEFAULT_THROTTLE_RATES[scope]`, например «5/min».
+
+    Хранилище выбирается настройкой THROTTLE_STORE: `memory` для одного
+    процесса, `cache` для нескольких. Проверка не обращается к базе.
+    """
+
+    scope = None
+    parse_rate = SimpleRateThrottle.parse_rate
+
+    def get_ident_key(self, request, view):
+        return self.get_ident(request)
+
+    def allow_request(self, request, view):
+        rate = api_settings.DEFAULT_THROTTLE_RATES.get(self.scope)
+        ident = self.get_ident_key(request, view)
+        if rate is None or ident is None:
+            return True
+        capacity, duration = self.parse_rate(rate)
+        self.wait_time = STORES[settings.THROTTLE_STORE].consume(
+            THROTTLE_KEY.format(self.scope, ident),
+            capacity, capacity / duration,
+        )
+        return not self.wait_time
+
+    def wait(self):
+        return self.wait_time
+
+
+class SignUpThrottle(TokenBucketThrottle):
+    scope = "signup"
+
+
+class TokenThrottle(TokenBucketThrottle):
+    scope = "token"
+
+
+class TokenUsernameThrottle(TokenBucketThrottle):
+    """Ограничивает подбор кода к одному пользователю с разных адресов."""
+
+    scope = "token_username"
+
+    def get_ident_key(self, request, view):
+        username = request.data.get("username")
+        return str(username).lower() if username else None
+
+
+class ReviewThrottle(TokenBucketThrottle):
+    scope = "review"
+
+    def get_ident_key(self, request, view):
+        if request.user.is_authenticated:
+            return f"user:{request.user.pk}"
+        return self.get_ident(request)
@@ -1,17 +1,15 @@
 import uuid
 
-from django.core.mail import send_mail
+from reviews.outbox import enqueue
 
-from api_yamdb.settings import ADMIN_EMAIL
 
+def make_confirmation_code():
+    return str(uuid.uuid4()).split("-")[0]
 
-def get_and_send_confirmation_code(user):
-    for u in user:
-        u.confirmation_code = str(uuid.uuid4()).split("-")[0]
-        u.save()
-        send_mail(
-            "Код подтверждения",
-            f'Код подтверждения "{u.username}": {u.confirmation_code}',
-            ADMIN_EMAIL,
-            [u.email],
-        )
+
+def send_confirmation_code(username, email, confirmation_code):
+    enqueue(
+        "Код подтверждения",
+        f'Код подтверждения "{username}": {confirmation_code}',
+        [email],
+    )
@@ -1,35 +1,56 @@
-from django.db.models import Avg
+from django.conf import settings
+from django.db import IntegrityError, transaction
+from django.db.models import Q
+from django.utils.functional import cached_property
 from django_filters.rest_framework import DjangoFilterBackend
 from django.shortcuts import get_object_or_404
 from rest_framework import filters, mixins, status, viewsets
-from rest_framework.decorators import action, api_view
-from rest_framework.permissions import (IsAuthenticated,
-                                        IsAuthenticatedOrReadOnly)
+from rest_framework.decorators import action, api_view, throttle_classes
+from rest_framework.exceptions import ValidationError
+from rest_framework.permissions import IsAuthenticated
 from rest_framework.response import Response
-from rest_framework_simplejwt.tokens import AccessToken
-
+from rest_framework.settings import api_settings
 
+from api.v1.authentication import issue_access_token
+from api.v1.autocomplete import index as autocomplete_index
+from api.v1.cache import CachedResponseMixin
+from api.v1.facets import get_facets
+from api.v1.filters import StableOrderingFilter, TitleFilter
+from api.v1.leaderboards import CATEGORY, GENRE, get_leaderboard
+from api.v1.pagination import CachedCountPagination, OptionalCursorPagination
 from api.v1.permissions import (
     IsAdmin,
     IsAuthorModeratorAdminOrReadOnly,
     ReadOnlyOrAdmin,
 )
 from api.v1.serializers import (
+    REVIEW_EXISTS_MESSAGE,
     GetTokenSerializer,
     SignUpSerializer,
     UserAdminSerializer,
     UserSerializer,
     GenreSerializer,
     CategorySerializer,
-    TitleSerializer,
+    TitleReadSerializer,
+    TitleWriteSerializer,
     ReviewSerializer,
     CommentSerializer,
 )
-from api.v1.utils import get_and_send_confirmation_code
+from api.v1.throttling import (
+    ReviewThrottle,
+    SignUpThrottle,
+    TokenThrottle,
+    TokenUsernameThrottle,
+)
+from reviews import search as fts
+from reviews.confirmation import check_code
 from reviews.models import Category, Genre, Review, Title, User
+from reviews.purge import (hide_title, hide_user, title_dependents,
+                           user_dependents)
 
 
 class ListCreateDeleteViewSet(
+    CachedResponseMixin,
     mixins.ListModelMixin,
     mixins.CreateModelMixin,
     mixins.DestroyModelMixin,
@@ -40,29 +61,161 @@ class ListCreateDeleteViewSet(
     permission_classes = (ReadOnlyOrAdmin,)
 
 
-class GenreViewSet(ListCreateDeleteViewSet):
+class TopTitlesMixin:
+    leaderboard_kind = None
+
+    @action(detail=True, methods=["get"], url_path="top")
+    def top(self, request, pk=None):
+        self.get_object()
+        ids = get_leaderboard(self.leaderboard_kind, pk)
+        titles = Title.objects.filter(is_hidden=False).select_related(
+            "category"
+        ).prefetch_related("genre").in_bulk(ids)
+        serializer = TitleReadSerializer(
+            [titles[title_id] for title_id in ids if title_id in titles],
+            many=True
+        )
+        return Response(serializer.data, status=status.HTTP_200_OK)
+
+
+class GenreViewSet(TopTitlesMixin, ListCreateDeleteViewSet):
+    leaderboard_kind = GENRE
+    cache_resources = ("genre",)
     queryset = Genre.objects.all()
     serializer_class = GenreSerializer
 
 
-class CategoryViewSet(ListCreateDeleteViewSet):
+class CategoryViewSet(TopTitlesMixin, ListCreateDeleteViewSet):
+    leaderboard_kind = CATEGORY
+    cache_resources = ("category",)
     queryset = Category.objects.all()
     serializer_class = CategorySerializer
 
 
-class TitleViewSet(viewsets.ModelViewSet):
-    filter_backends = (DjangoFilterBackend, filters.SearchFilter)
-    filterset_fields = ("year", "name", "genre", "category")
-    search_fields = ("genre__slug",)
+class BackgroundDestroyMixin:
+    """Удаление с большим числом зависимых записей уходит в фон.
+
+    Если у объекта больше CASCADE_DELETE_ASYNC_THRESHOLD отзывов и
+    комментариев, он сразу скрывается, ответ — 202, а зависимые записи
+    удаляются пачками фоновым обработчиком.
+    """
+
+    count_dependents = None
+    hide = None
+
+    def destroy(self, request, *args, **kwargs):
+        instance = self.get_object()
+        if self.count_dependents(instance) > (
+            settings.CASCADE_DELETE_ASYNC_THRESHOLD
+        ):
+            self.hide(instance)
+            return Response(status=status.HTTP_202_ACCEPTED)
+        self.perform_destroy(instance)
+        return Response(status=status.HTTP_204_NO_CONTENT)
+
+
+class TitleViewSet(
+    BackgroundDestroyMixin, CachedResponseMixin, viewsets.ModelViewSet
+):
+    cache_resources = ("title", "genre", "category")
+    filter_backends = (DjangoFilterBackend, StableOrderingFilter)
+    filterset_class = TitleFilter
+    ordering_fields = ("rating", "year", "name", "review_count")
+    ordering = ("id",)
     permission_classes = (ReadOnlyOrAdmin,)
     http_method_names = ["patch", "get", "post", "delete"]
-    serializer_class = TitleSerializer
-    queryset = Title.objects.annotate(rating=Avg('review__score')).all()
+    pagination_class = OptionalCursorPagination
+    # Поиск отдаёт список id по релевантности, курсор к нему неприменим.
+    search_pagination_class = CachedCountPagination
+    cursor_ordering = ("id",)
+    queryset = Title.objects.filter(is_hidden=False).select_related(
+        "category"
+    ).prefetch_related("genre")
+    count_dependents = staticmethod(title_dependents)
+    hide = staticmethod(hide_title)
+
+    def get_serializer_class(self):
+        if self.action in ("list", "retrieve"):
+            return TitleReadSerializer
+        return TitleWriteSerializer
+
+    def paginate_queryset(self, queryset):
+        self.filtered_queryset = queryset
+        return super().paginate_queryset(queryset)
+
+    def get_paginated_response(self, data):
+        response = super().get_paginated_response(data)
+        facets = self.request.query_params.get("facets")
+        if facets and self.action == "list":
+            response.data["facets"] = get_facets(
+                self.filtered_queryset, facets.split(",")
+            )
+        return response
+
+    def includes_reviews(self):
+        include = self.request.query_params.get("include", "")
+        return "reviews" in include.split(",")
 
+    def get_cache_resources(self):
+        if self.includes_reviews():
+            return self.cache_resources + ("comment", "user")
+        return self.cache_resources
 
-class UserViewSet(viewsets.ModelViewSet):
+    def get_latest_reviews(self, title):
+        try:
+            limit = int(self.request.query_params.get(
+                "reviews_limit", settings.TITLE_REVIEWS_LIMIT
+            ))
+        except ValueError:
+            limit = settings.TITLE_REVIEWS_LIMIT
+        limit = max(1, min(limit, settings.TITLE_REVIEWS_MAX_LIMIT))
+        reviews = title.review.select_related("author").order_by(
+            "-pub_date", "-id"
+        )[:limit]
+        return ReviewSerializer(
+            reviews, many=True, context=self.get_serializer_context()
+        ).data
+
+    def retrieve_title(self, request, *args, **kwargs):
+        instance = self.get_object()
+        data = self.get_serializer(instance).data
+        if self.includes_reviews():
+            data["reviews"] = self.get_latest_reviews(instance)
+        return Response(data)
+
+    def retrieve(self, request, *args, **kwargs):
+        return self.cached_response(
+            self.retrieve_title, request, *args, **kwargs
+        )
+
+    @action(detail=False, methods=["get"], url_path="search")
+    def search(self, request):
+        query = request.query_params.get("q", "")
+        if fts.is_available():
+            ids = fts.search_titles(query, settings.TITLE_SEARCH_LIMIT)
+        else:
+            ids = list(
+                Title.objects.filter(
+                    Q(name__icontains=query) | Q(description__icontains=query),
+                    is_hidden=False,
+                ).values_list("pk", flat=True)[:settings.TITLE_SEARCH_LIMIT]
+            )
+        paginator = self.search_pagination_class()
+        page = paginator.paginate_queryset(ids, request, view=self)
+        titles = self.get_queryset().in_bulk(page)
+        serializer = TitleReadSerializer(
+            [titles[title_id] for title_id in page if title_id in titles],
+            many=True,
+        )
+        return paginator.get_paginated_response(serializer.data)
+
+
+class UserViewSet(BackgroundDestroyMixin, viewsets.ModelViewSet):
+    cache_resources = ("user",)
     lookup_field = "username"
-    queryset = User.objects.all()
+    queryset = User.objects.filter(is_hidden=False)
+    count_dependents = staticmethod(user_dependents)
+    hide = staticmethod(hide_user)
     serializer_class = UserAdminSerializer
     permission_classes = (IsAdmin,)
     http_method_names = ["patch", "get", "post", "delete"]
@@ -86,31 +239,40 @@ class UserViewSet(viewsets.ModelViewSet):
         return Response(serializer.data, status=status.HTTP_200_OK)
 
 
-@api_view(["POST"])
-def signup(request):
-    user = User.objects.filter(
-        username=request.data.get("username"), email=request.data.get("email")
+@api_view(["GET"])
+def autocomplete(request):
+    try:
+        limit = int(request.query_params.get("limit", 10))
+    except ValueError:
+        return Response(status=status.HTTP_400_BAD_REQUEST)
+    limit = max(1, min(limit, settings.AUTOCOMPLETE_MAX_LIMIT))
+    return Response(
+        autocomplete_index.search(request.query_params.get("q", ""), limit),
+        status=status.HTTP_200_OK,
     )
-    if user.exists():
-        get_and_send_confirmation_code(user)
-        return Response(request.data, status=status.HTTP_200_OK)
 
+
+@api_view(["POST"])
+@throttle_classes([SignUpThrottle])
+def signup(request):
     serializer = SignUpSerializer(data=request.data)
     serializer.is_valid(raise_exception=True)
     serializer.save()
-    user = User.objects.filter(**serializer.data)
-    get_and_send_confirmation_code(user)
     return Response(serializer.data, status=status.HTTP_200_OK)
 
 
 @api_view(["POST"])
+@throttle_classes([TokenThrottle, TokenUsernameThrottle])
 def token(request):
     serializer = GetTokenSerializer(data=request.data)
     serializer.is_valid(raise_exception=True)
-    user = get_object_or_404(User, username=serializer.data["username"])
+    user = get_object_or_404(
+        User.objects.select_related("confirmation"),
+        username=serializer.data["username"], is_hidden=False,
+    )
 
-    if serializer.data["confirmation_code"] == user.confirmation_code:
-        access_token = AccessToken.for_user(user)
+    if check_code(user, serializer.data["confirmation_code"]):
+        access_token = issue_access_token(user)
         return Response(
             {"token": str(access_token)}, status=status.HTTP_200_OK
         )
@@ -120,33 +282,55 @@ def token(request):
 
 class ReviewViewSet(viewsets.ModelViewSet):
     serializer_class = ReviewSerializer
-    permission_classes = (IsAuthorModeratorAdminOrReadOnly,
-                          IsAuthenticatedOrReadOnly)
+    cache_resources = ("review",)
+    permission_classes = (IsAuthorModeratorAdminOrReadOnly,)
     http_method_names = ["patch", "get", "post", "delete"]
+    pagination_class = OptionalCursorPagination
+    cursor_ordering = ("pub_date", "id")
+
+    def get_throttles(self):
+        if self.action == "create":
+            return [ReviewThrottle()]
+        return super().get_throttles()
 
-    def get_title(self):
-        return get_object_or_404(Title, pk=self.kwargs["title_id"])
+    @cached_property
+    def title(self):
+        return get_object_or_404(
+            Title, pk=self.kwargs["title_id"], is_hidden=False
+        )
 
     def get_queryset(self):
-        return self.get_title().review.all()
+        return self.title.review.select_related("author")
 
     def perform_create(self, serializer):
-        serializer.save(author=self.request.user, title=self.get_title())
+        # Повторный отзыв отсекает ограничение `unique review`, а не
+        # отдельный запрос на существование.
+        try:
+            with transaction.atomic():
+                serializer.save(author=self.request.user, title=self.title)
+        except IntegrityError:
+            raise ValidationError(
+                {api_settings.NON_FIELD_ERRORS_KEY: [REVIEW_EXISTS_MESSAGE]}
+            )
 
 
 class CommentViewSet(viewsets.ModelViewSet):
     serializer_class = CommentSerializer
-    permission_classes = (IsAuthorModeratorAdminOrReadOnly,
-                          IsAuthenticatedOrReadOnly)
+    cache_resources = ("comment",)
+    permission_classes = (IsAuthorModeratorAdminOrReadOnly,)
     http_method_names = ["patch", "get", "post", "delete"]
+    pagination_class = OptionalCursorPagination
+    cursor_ordering = ("pub_date", "id")
 
-    def get_review(self):
+    @cached_property
+    def review(self):
         return get_object_or_404(
-            Review, pk=self.kwargs["review_id"], title=self.kwargs["title_id"]
+            Review, pk=self.kwargs["review_id"], title=self.kwargs["title_id"],
+            title__is_hidden=False,
         )
 
     def get_queryset(self):
-        return self.get_review().comment.all()
+        return self.review.comment.select_related("author")
 
     def perform_create(self, serializer):
-        serializer.save(author=self.request.user, review=self.get_review())
+        serializer.save(author=self.request.user, review=self.review)
@@ -31,13 +31,22 @@ REST_FRAMEWORK = {
         "rest_framework.permissions.AllowAny",
     ],
     "DEFAULT_AUTHENTICATION_CLASSES": [
-        "rest_framework_simplejwt.authentication.JWTAuthentication",
+        "api.v1.authentication.CachedJWTAuthentication",
     ],
     "DEFAULT_FILTER_BACKENDS": [
         "django_filters.rest_framework.DjangoFilterBackend",
     ],
-    "DEFAULT_PAGINATION_CLASS": "rest_framework.pagination.LimitOffsetPagination",
+    "DEFAULT_PAGINATION_CLASS": "api.v1.pagination.CachedCountPagination",
     "PAGE_SIZE": 5,
+    # Адрес клиента берётся из REMOTE_ADDR: заголовку X-Forwarded-For
+    # без доверенного прокси верить нельзя. За прокси укажите их число.
+    "NUM_PROXIES": 0,
+    "DEFAULT_THROTTLE_RATES": {
+        "signup": "20/hour",
+        "token": "30/min",
+        "token_username": "10/min",
+        "review": "10/min",
+    },
 }
 
 SIMPLE_JWT = {
@@ -92,6 +101,71 @@ DATABASES = {
 }
 
 
+CACHES = {
+    "default": {
+        "BACKEND": "django.core.cache.backends.locmem.LocMemCache",
+        "LOCATION": "api_yamdb",
+        # Ответы, счётчики, таблицы лидеров, версии и корзины ограничений
+        # делят один кэш: 300 записей по умолчанию вытеснялись бы сразу.
+        "OPTIONS": {"MAX_ENTRIES": 50_000},
+    }
+}
+
+RESPONSE_CACHE_TIMEOUT = 60
+
+PAGINATION_COUNT_TIMEOUT = 300
+
+PAGINATION_COUNT_ESTIMATE_THRESHOLD = None
+
+LEADERBOARD_SIZE = 10
+
+LEADERBOARD_MIN_VOTES = 3
+
+LEADERBOARD_TIMEOUT = 60
+
+TITLE_SEARCH_LIMIT = 100
+
+AUTOCOMPLETE_MAX_LIMIT = 20
+
+AUTOCOMPLETE_MAX_AGE = 60
+
+TITLE_REVIEWS_LIMIT = 5
+
+TITLE_REVIEWS_MAX_LIMIT = 20
+
+CASCADE_DELETE_ASYNC_THRESHOLD = 500
+
+CASCADE_DELETE_BATCH_SIZE = 200
+
+CASCADE_DELETE_EAGER = False
+
+MAIL_OUTBOX_BATCH_SIZE = 100
+
+MAIL_OUTBOX_MAX_ATTEMPTS = 5
+
+MAIL_OUTBOX_CLAIM_TIMEOUT = 5 * 60
+
+MAIL_OUTBOX_RETRY_DELAY = 60
+
+MAIL_OUTBOX_EAGER = False
+
+AUTH_USER_CACHE_SIZE = 1024
+
+AUTH_USER_CACHE_TIMEOUT = 5 * 60
+
+TOKEN_REVOCATION_POLL_INTERVAL = 5
+
+CONFIRMATION_CODE_TIMEOUT = 60 * 60
+
+CONFIRMATION_CODE_MAX_ATTEMPTS = 5
+
+CONFIRMATION_CODE_BATCH_SIZE = 1000
+
+THROTTLE_STORE = "memory"
+
+THROTTLE_MAX_BUCKETS = 100_000
+
+
 AUTH_PASSWORD_VALIDATORS = [
     {
         "NAME": "django.contrib.auth.password_validation.UserAttributeSimilarityValidator",
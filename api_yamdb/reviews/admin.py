@@ -1,7 +1,7 @@
 from django.contrib import admin
 
 from reviews.models import (Category, Comment, Genre,
-                            GenreTitle, Review, Title, User)
+                            GenreTitle, OutboxMail, Review, Title, User)
 
 
 @admin.register(User)
@@ -31,7 +31,7 @@ class GenreAdmin(admin.ModelAdmin):
 
 @admin.register(Title)
 class TitleAdmin(admin.ModelAdmin):
-    list_display = ("pk", "name", "year", "category")
+    list_display = ("pk", "name", "year", "category", "rating")
     list_editable = ("category",)
     search_fields = (
         "name",
@@ -55,6 +55,7 @@ class ReviewAdmin(admin.ModelAdmin):
         "author",
         "score",
         "pub_date",
+        "comment_count",
     )
     search_fields = ("text", "score", "author")
     list_filter = ("pub_date",)
@@ -76,3 +77,11 @@ class CommentAdmin(admin.ModelAdmin):
     )
     list_filter = ("pub_date",)
     empty_value_display = "-пусто-"
+
+
+@admin.register(OutboxMail)
+class OutboxMailAdmin(admin.ModelAdmin):
+    list_display = ("pk", "recipient", "subject", "created", "sent",
+                    "attempts")
+    search_fields = ("recipient",)
+    empty_value_display = "-пусто-"
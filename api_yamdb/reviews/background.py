@@ -0,0 +1,64 @@
+import logging
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+from django.db import close_old_connections, transaction
+
+MAIL = "mail"
+PURGE = "purge"
+
+logger = logging.getLogger(__name__)
+executors = {
+    queue: ThreadPoolExecutor(max_workers=1, thread_name_prefix=queue)
+    for queue in (MAIL, PURGE)
+}
+timers = {}
+timers_lock = threading.Lock()
+
+
+def run(task, *args):
+    close_old_connections()
+    try:
+        task(*args)
+    except Exception:
+        # Результат задачи никто не ждёт: без записи в лог ошибка пропадёт.
+        logger.exception("Фоновая задача %s%r завершилась ошибкой",
+                         task.__name__, args)
+    finally:
+        close_old_connections()
+
+
+def schedule(task, *args, queue, eager=False):
+    """Запускает задачу в фоновом потоке после фиксации транзакции.
+
+    У каждой очереди (MAIL, PURGE) свой поток: задачи одной очереди
+    выполняются по очереди, а долгая очистка не задерживает письма.
+    С `eager=True` задача выполняется сразу в текущем потоке.
+    """
+    if eager:
+        task(*args)
+    else:
+        transaction.on_commit(
+            lambda: executors[queue].submit(run, task, *args)
+        )
+
+
+def schedule_later(delay, task, *args, queue):
+    """Ставит задачу в очередь `queue` через `delay` секунд.
+
+    Пока такая же задача ждёт своего часа, повторный вызов ничего не
+    делает. Таймер не переживает перезапуск процесса.
+    """
+    key = (queue, task, args)
+
+    def submit():
+        with timers_lock:
+            timers.pop(key, None)
+        executors[queue].submit(run, task, *args)
+
+    with timers_lock:
+        if key in timers:
+            return
+        timers[key] = timer = threading.Timer(delay, submit)
+    timer.daemon = True
+    timer.start()
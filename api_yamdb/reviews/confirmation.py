@@ -0,0 +1,59 @@
+from datetime import timedelta
+
+from django.conf import settings
+from django.db.models import F
+from django.utils import timezone
+from django.utils.crypto import constant_time_compare, salted_hmac
+
+from reviews.models import ConfirmationCode
+from reviews.purge import delete_in_batches
+
+KEY_SALT = "reviews.confirmation"
+
+
+def hash_code(code):
+    return salted_hmac(KEY_SALT, str(code)).hexdigest()
+
+
+def store_code(user_id, code):
+    """Сохраняет хэш нового кода пользователя, сбрасывая попытки."""
+    fields = {
+        "code_hash": hash_code(code),
+        "expires": timezone.now()
+        + timedelta(seconds=settings.CONFIRMATION_CODE_TIMEOUT),
+        "attempts": 0,
+    }
+    if not ConfirmationCode.objects.filter(user_id=user_id).update(**fields):
+        ConfirmationCode.objects.create(user_id=user_id, **fields)
+
+
+def check_code(user, code):
+    """Проверяет код по записи, загруженной вместе с пользователем.
+
+    Верный код одноразовый и удаляется, неверный увеличивает счётчик
+    попыток; после CONFIRMATION_CODE_MAX_ATTEMPTS код не принимается.
+    """
+    try:
+        confirmation = user.confirmation
+    except ConfirmationCode.DoesNotExist:
+        return False
+    if (
+        confirmation.expires <= timezone.now()
+        or confirmation.attempts >= settings.CONFIRMATION_CODE_MAX_ATTEMPTS
+    ):
+        return False
+    if constant_time_compare(confirmation.code_hash, hash_code(code)):
+        confirmation.delete()
+        return True
+    ConfirmationCode.objects.filter(pk=confirmation.pk).update(
+        attempts=F("attempts") + 1
+    )
+    return False
+
+
+def purge_expired_codes():
+    """Удаляет просроченные коды пачками по CONFIRMATION_CODE_BATCH_SIZE."""
+    return delete_in_batches(
+        ConfirmationCode.objects.filter(expires__lte=timezone.now()),
+        settings.CONFIRMATION_CODE_BATCH_SIZE,
+    )
@@ -0,0 +1,30 @@
+from django.db.models import Count, F, OuterRef, Subquery
+from django.db.models.functions import Coalesce
+from django.dispatch import Signal
+
+from reviews.models import Comment, Review
+
+# Отправляется после пересчёта счётчиков комментариев.
+comment_counts_rebuilt = Signal()
+
+
+def update_comment_count(review_id, delta):
+    Review.objects.filter(pk=review_id).update(
+        comment_count=F("comment_count") + delta
+    )
+
+
+def rebuild_comment_counts(reviews=None):
+    """Пересчитывает число комментариев к отзывам одним UPDATE."""
+    if reviews is None:
+        reviews = Review.objects.all()
+    comments = (
+        Comment.objects.filter(review=OuterRef("pk"))
+        .order_by()
+        .values("review")
+        .annotate(value=Count("pk"))
+        .values("value")
+    )
+    updated = reviews.update(comment_count=Coalesce(Subquery(comments), 0))
+    comment_counts_rebuilt.send(sender=Review)
+    return updated
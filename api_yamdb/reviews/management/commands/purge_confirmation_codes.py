@@ -0,0 +1,11 @@
+from django.core.management.base import BaseCommand
+
+from reviews.confirmation import purge_expired_codes
+
+
+class Command(BaseCommand):
+    help = "Удаляет просроченные коды подтверждения."
+
+    def handle(self, *args, **options):
+        deleted = purge_expired_codes()
+        print(f'Удалено кодов - {deleted}.')
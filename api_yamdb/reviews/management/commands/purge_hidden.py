@@ -0,0 +1,13 @@
+from django.core.management.base import BaseCommand
+
+from reviews.purge import purge_hidden
+
+
+class Command(BaseCommand):
+    help = ("Удаляет пачками произведения и пользователей, отмеченных "
+            "для удаления, вместе с их отзывами и комментариями.")
+
+    def handle(self, *args, **options):
+        titles, users = purge_hidden()
+        print(f'Удаление завершено. Произведений - {titles}, '
+              f'пользователей - {users}.')
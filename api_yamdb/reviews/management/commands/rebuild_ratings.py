@@ -0,0 +1,11 @@
+from django.core.management.base import BaseCommand
+
+from reviews.ratings import rebuild_title_ratings
+
+
+class Command(BaseCommand):
+    help = "Пересчитывает сумму оценок, число отзывов и рейтинг произведений."
+
+    def handle(self, *args, **options):
+        updated = rebuild_title_ratings()
+        print(f'Рейтинг пересчитан. Обновлено произведений - {updated}.')
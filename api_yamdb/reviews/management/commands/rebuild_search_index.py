@@ -0,0 +1,15 @@
+from django.core.management.base import BaseCommand, CommandError
+
+from reviews.search import is_available, rebuild_index
+
+
+class Command(BaseCommand):
+    help = "Перестраивает полнотекстовый индекс произведений (SQLite FTS5)."
+
+    def handle(self, *args, **options):
+        if not is_available():
+            raise CommandError(
+                "Полнотекстовый индекс доступен только в SQLite."
+            )
+        indexed = rebuild_index()
+        print(f'Индекс перестроен. Проиндексировано произведений - {indexed}.')
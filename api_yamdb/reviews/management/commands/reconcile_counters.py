@@ -0,0 +1,15 @@
+from django.core.management.base import BaseCommand
+
+from reviews.counters import rebuild_comment_counts
+from reviews.ratings import rebuild_title_ratings
+
+
+class Command(BaseCommand):
+    help = ("Сверяет счётчики отзывов, рейтинг произведений и счётчики "
+            "комментариев с таблицами отзывов и комментариев.")
+
+    def handle(self, *args, **options):
+        titles = rebuild_title_ratings()
+        reviews = rebuild_comment_counts()
+        print(f'Счётчики пересчитаны. Произведений - {titles}, '
+              f'отзывов - {reviews}.')
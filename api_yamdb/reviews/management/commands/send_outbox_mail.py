@@ -0,0 +1,12 @@
+from django.core.management.base import BaseCommand
+
+from reviews.outbox import send_pending
+
+
+class Command(BaseCommand):
+    help = ("Отправляет письма из очереди, в том числе не отправленные "
+            "из-за ошибок почтового сервера.")
+
+    def handle(self, *args, **options):
+        sent = send_pending()
+        print(f'Отправлено писем - {sent}.')
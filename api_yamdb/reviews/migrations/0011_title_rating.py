@@ -0,0 +1,55 @@
+from django.db import migrations, models
+from django.db.models import Avg, Count, OuterRef, Subquery, Sum
+from django.db.models.functions import Coalesce
+
+
+def fill_title_rating(apps, schema_editor):
+    Title = apps.get_model("reviews", "Title")
+    Review = apps.get_model("reviews", "Review")
+    reviews = (
+        Review.objects.filter(title=OuterRef("pk")).order_by().values("title")
+    )
+    Title.objects.update(
+        score_sum=Coalesce(
+            Subquery(reviews.annotate(value=Sum("score")).values("value")), 0
+        ),
+        review_count=Coalesce(
+            Subquery(reviews.annotate(value=Count("pk")).values("value")), 0
+        ),
+        rating=Subquery(
+            reviews.annotate(value=Avg("score")).values("value"),
+            output_field=models.FloatField(),
+        ),
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("reviews", "0010_alter_user_confirmation_code"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="title",
+            name="score_sum",
+            field=models.PositiveIntegerField(
+                default=0, editable=False, verbose_name="сумма оценок"
+            ),
+        ),
+        migrations.AddField(
+            model_name="title",
+            name="review_count",
+            field=models.PositiveIntegerField(
+                default=0, editable=False, verbose_name="количество отзывов"
+            ),
+        ),
+        migrations.AddField(
+            model_name="title",
+            name="rating",
+            field=models.FloatField(
+                blank=True, editable=False, null=True, verbose_name="рейтинг"
+            ),
+        ),
+        migrations.RunPython(fill_title_rating, migrations.RunPython.noop),
+    ]
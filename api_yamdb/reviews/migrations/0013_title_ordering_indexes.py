@@ -0,0 +1,29 @@
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("reviews", "0012_pagination_indexes"),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name="title",
+            index=models.Index(fields=["rating"], name="title_rating_idx"),
+        ),
+        migrations.AddIndex(
+            model_name="title",
+            index=models.Index(
+                fields=["review_count"], name="title_review_count_idx"
+            ),
+        ),
+        migrations.AddIndex(
+            model_name="title",
+            index=models.Index(fields=["year"], name="title_year_idx"),
+        ),
+        migrations.AddIndex(
+            model_name="title",
+            index=models.Index(fields=["name"], name="title_name_idx"),
+        ),
+    ]
@@ -0,0 +1,35 @@
+from django.db import migrations
+
+# Имя таблицы и схема зафиксированы здесь, а не берутся из reviews.search,
+# чтобы изменения модуля не меняли уже применённую миграцию.
+FTS_TABLE = "reviews_title_fts"
+
+
+def create_title_index(apps, schema_editor):
+    if schema_editor.connection.vendor != "sqlite":
+        return
+    schema_editor.execute(
+        f"CREATE VIRTUAL TABLE IF NOT EXISTS {FTS_TABLE} USING fts5("
+        "name, description, tokenize='unicode61 remove_diacritics 2')"
+    )
+    schema_editor.execute(
+        f"INSERT INTO {FTS_TABLE} (rowid, name, description) "
+        "SELECT id, name, description FROM reviews_title"
+    )
+
+
+def drop_title_index(apps, schema_editor):
+    if schema_editor.connection.vendor != "sqlite":
+        return
+    schema_editor.execute(f"DROP TABLE IF EXISTS {FTS_TABLE}")
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("reviews", "0013_title_ordering_indexes"),
+    ]
+
+    operations = [
+        migrations.RunPython(create_title_index, drop_title_index),
+    ]
@@ -0,0 +1,37 @@
+from django.db import migrations, models
+from django.db.models import Min
+
+
+def remove_duplicate_genre_titles(apps, schema_editor):
+    GenreTitle = apps.get_model("reviews", "GenreTitle")
+    keep = (
+        GenreTitle.objects.values("genre", "title")
+        .annotate(keep_id=Min("id"))
+        .values("keep_id")
+    )
+    GenreTitle.objects.exclude(id__in=keep).delete()
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("reviews", "0014_title_search_index"),
+    ]
+
+    operations = [
+        migrations.RunPython(
+            remove_duplicate_genre_titles, migrations.RunPython.noop
+        ),
+        migrations.AddConstraint(
+            model_name="genretitle",
+            constraint=models.UniqueConstraint(
+                fields=("genre", "title"), name="unique genre title"
+            ),
+        ),
+        migrations.AddIndex(
+            model_name="title",
+            index=models.Index(
+                fields=["category", "year"], name="title_category_year_idx"
+            ),
+        ),
+    ]
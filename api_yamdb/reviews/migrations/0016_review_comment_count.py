@@ -0,0 +1,35 @@
+from django.db import migrations, models
+from django.db.models import Count, OuterRef, Subquery
+from django.db.models.functions import Coalesce
+
+
+def fill_comment_count(apps, schema_editor):
+    Review = apps.get_model("reviews", "Review")
+    Comment = apps.get_model("reviews", "Comment")
+    comments = (
+        Comment.objects.filter(review=OuterRef("pk"))
+        .order_by()
+        .values("review")
+        .annotate(value=Count("pk"))
+        .values("value")
+    )
+    Review.objects.update(comment_count=Coalesce(Subquery(comments), 0))
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("reviews", "0015_catalog_indexes"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="review",
+            name="comment_count",
+            field=models.PositiveIntegerField(
+                default=0, editable=False,
+                verbose_name="количество комментариев",
+            ),
+        ),
+        migrations.RunPython(fill_comment_count, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,31 @@
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("reviews", "0016_review_comment_count"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="title",
+            name="is_hidden",
+            field=models.BooleanField(
+                default=False, verbose_name="ожидает удаления"
+            ),
+        ),
+        migrations.AddField(
+            model_name="user",
+            name="is_hidden",
+            field=models.BooleanField(
+                default=False, verbose_name="ожидает удаления"
+            ),
+        ),
+        migrations.AddIndex(
+            model_name="title",
+            index=models.Index(
+                fields=["is_hidden"], name="title_is_hidden_idx"
+            ),
+        ),
+    ]
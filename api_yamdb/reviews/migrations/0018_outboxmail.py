@@ -0,0 +1,49 @@
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("reviews", "0017_hidden_flags"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="OutboxMail",
+            fields=[
+                ("id", models.BigAutoField(
+                    auto_created=True, primary_key=True, serialize=False,
+                    verbose_name="ID",
+                )),
+                ("subject", models.CharField(
+                    max_length=255, verbose_name="тема"
+                )),
+                ("body", models.TextField(verbose_name="текст")),
+                ("recipient", models.EmailField(
+                    max_length=254, verbose_name="получатель"
+                )),
+                ("created", models.DateTimeField(
+                    auto_now_add=True, verbose_name="дата создания"
+                )),
+                ("sent", models.DateTimeField(
+                    blank=True, null=True, verbose_name="дата отправки"
+                )),
+                ("attempts", models.PositiveSmallIntegerField(
+                    default=0, verbose_name="попытки отправки"
+                )),
+                ("error", models.TextField(
+                    blank=True, verbose_name="последняя ошибка"
+                )),
+            ],
+            options={
+                "verbose_name": "письмо",
+                "verbose_name_plural": "письма",
+            },
+        ),
+        migrations.AddIndex(
+            model_name="outboxmail",
+            index=models.Index(
+                fields=["sent", "id"], name="outbox_pending_idx"
+            ),
+        ),
+    ]
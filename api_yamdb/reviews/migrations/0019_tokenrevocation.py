@@ -0,0 +1,36 @@
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("reviews", "0018_outboxmail"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="TokenRevocation",
+            fields=[
+                ("id", models.BigAutoField(
+                    auto_created=True, primary_key=True, serialize=False,
+                    verbose_name="ID",
+                )),
+                ("user_id", models.BigIntegerField(
+                    verbose_name="id пользователя"
+                )),
+                ("revoked_at", models.DateTimeField(
+                    auto_now_add=True, verbose_name="дата отзыва"
+                )),
+            ],
+            options={
+                "verbose_name": "отзыв токенов",
+                "verbose_name_plural": "отзывы токенов",
+            },
+        ),
+        migrations.AddIndex(
+            model_name="tokenrevocation",
+            index=models.Index(
+                fields=["revoked_at"], name="token_revocation_date_idx"
+            ),
+        ),
+    ]
@@ -0,0 +1,70 @@
+from datetime import timedelta
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+from django.utils import timezone
+from django.utils.crypto import salted_hmac
+
+
+def move_codes(apps, schema_editor):
+    User = apps.get_model("reviews", "User")
+    ConfirmationCode = apps.get_model("reviews", "ConfirmationCode")
+    expires = timezone.now() + timedelta(
+        seconds=settings.CONFIRMATION_CODE_TIMEOUT
+    )
+    ConfirmationCode.objects.bulk_create(
+        ConfirmationCode(
+            user_id=user_id,
+            code_hash=salted_hmac("reviews.confirmation", code).hexdigest(),
+            expires=expires,
+        )
+        for user_id, code in User.objects.filter(
+            confirmation_code__isnull=False
+        ).values_list("pk", "confirmation_code").iterator()
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("reviews", "0019_tokenrevocation"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="ConfirmationCode",
+            fields=[
+                ("user", models.OneToOneField(
+                    on_delete=django.db.models.deletion.CASCADE,
+                    primary_key=True, related_name="confirmation",
+                    serialize=False, to=settings.AUTH_USER_MODEL,
+                    verbose_name="пользователь",
+                )),
+                ("code_hash", models.CharField(
+                    max_length=128, verbose_name="хэш кода"
+                )),
+                ("expires", models.DateTimeField(
+                    verbose_name="действует до"
+                )),
+                ("attempts", models.PositiveSmallIntegerField(
+                    default=0, verbose_name="неверные попытки"
+                )),
+            ],
+            options={
+                "verbose_name": "код подтверждения",
+                "verbose_name_plural": "коды подтверждения",
+            },
+        ),
+        migrations.AddIndex(
+            model_name="confirmationcode",
+            index=models.Index(
+                fields=["expires"], name="confirmation_expires_idx"
+            ),
+        ),
+        migrations.RunPython(move_codes, migrations.RunPython.noop),
+        migrations.RemoveField(
+            model_name="user",
+            name="confirmation_code",
+        ),
+    ]
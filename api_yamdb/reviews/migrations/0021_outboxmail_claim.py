@@ -0,0 +1,26 @@
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("reviews", "0020_confirmationcode"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="outboxmail",
+            name="claim",
+            field=models.UUIDField(
+                blank=True, db_index=True, null=True,
+                verbose_name="захвачено отправкой",
+            ),
+        ),
+        migrations.AddField(
+            model_name="outboxmail",
+            name="claimed_until",
+            field=models.DateTimeField(
+                blank=True, null=True, verbose_name="захвачено до"
+            ),
+        ),
+    ]
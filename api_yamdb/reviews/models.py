@@ -23,8 +23,8 @@ class User(AbstractUser):
     email = models.EmailField(unique=True)
     bio = models.TextField(blank=True, max_length=100, null=True)
     role = models.SlugField(choices=ROLES, default=USER, max_length=30)
-    confirmation_code = models.SlugField(
-        null=True, blank=True, max_length=200, editable=True, unique=True
+    is_hidden = models.BooleanField(
+        verbose_name="ожидает удаления", default=False
     )
 
     @property
@@ -39,6 +39,28 @@ class User(AbstractUser):
         return f"{self.first_name} {self.last_name}"
 
 
+class AggregatesModel(models.Model):
+    """Модель со счётчиками, которые обновляются только сигналами.
+
+    При сохранении существующей записи поля из `AGGREGATE_FIELDS` не
+    пишутся, иначе устаревший экземпляр затрёт накопленные значения.
+    """
+
+    AGGREGATE_FIELDS = ()
+
+    class Meta:
+        abstract = True
+
+    def save(self, *args, **kwargs):
+        if not self._state.adding and kwargs.get("update_fields") is None:
+            kwargs["update_fields"] = [
+                field.name for field in self._meta.concrete_fields
+                if not field.primary_key
+                and field.name not in self.AGGREGATE_FIELDS
+            ]
+        super().save(*args, **kwargs)
+
+
 class Genre(models.Model):
     name = models.CharField(max_length=LENGTH_NAME)
     slug = models.SlugField(primary_key=True)
@@ -55,7 +77,7 @@ class Category(models.Model):
         return f"{self.name}{self.slug}"
 
 
-class Title(models.Model):
+class Title(AggregatesModel):
     name = models.CharField(max_length=LENGTH_NAME)
     year = models.SmallIntegerField()
     description = models.TextField()
@@ -66,6 +88,34 @@ class Title(models.Model):
         Category, on_delete=models.SET_NULL,
         related_name="title", blank=True, null=True
     )
+    score_sum = models.PositiveIntegerField(
+        verbose_name="сумма оценок", default=0, editable=False
+    )
+    review_count = models.PositiveIntegerField(
+        verbose_name="количество отзывов", default=0, editable=False
+    )
+    rating = models.FloatField(
+        verbose_name="рейтинг", null=True, blank=True, editable=False
+    )
+    is_hidden = models.BooleanField(
+        verbose_name="ожидает удаления", default=False
+    )
+
+    AGGREGATE_FIELDS = ("score_sum", "review_count", "rating")
+
+    class Meta:
+        indexes = [
+            models.Index(fields=("rating",), name="title_rating_idx"),
+            models.Index(
+                fields=("review_count",), name="title_review_count_idx"
+            ),
+            models.Index(fields=("year",), name="title_year_idx"),
+            models.Index(fields=("name",), name="title_name_idx"),
+            models.Index(
+                fields=("category", "year"), name="title_category_year_idx"
+            ),
+            models.Index(fields=("is_hidden",), name="title_is_hidden_idx"),
+        ]
 
     def __str__(self):
         return self.name
@@ -76,8 +126,15 @@ class GenreTitle(models.Model):
     genre = models.ForeignKey(Genre, on_delete=models.CASCADE)
     title = models.ForeignKey(Title, on_delete=models.CASCADE)
 
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(
+                fields=("genre", "title"), name="unique genre title"
+            )
+        ]
 
-class Review(models.Model):
+
+class Review(AggregatesModel):
     title = models.ForeignKey(
         Title,
         on_delete=models.CASCADE,
@@ -95,6 +152,11 @@ class Review(models.Model):
     )
     pub_date = models.DateTimeField(verbose_name="дата публикации",
                                     auto_now_add=True)
+    comment_count = models.PositiveIntegerField(
+        verbose_name="количество комментариев", default=0, editable=False
+    )
+
+    AGGREGATE_FIELDS = ("comment_count",)
 
     class Meta:
         verbose_name = "отзыв"
@@ -108,6 +170,12 @@ class Review(models.Model):
                 name="unique review",
             )
         ]
+        indexes = [
+            models.Index(
+                fields=("title", "pub_date", "id"),
+                name="review_title_pub_date_idx",
+            )
+        ]
         ordering = ("pub_date",)
 
     def __str__(self):
@@ -132,6 +200,80 @@ class Comment(models.Model):
     class Meta:
         verbose_name = "комментарий"
         verbose_name_plural = "комментарий"
+        indexes = [
+            models.Index(
+                fields=("review", "pub_date", "id"),
+                name="comment_review_pub_date_idx",
+            )
+        ]
 
     def __str__(self):
         return self.text
+
+
+class ConfirmationCode(models.Model):
+    user = models.OneToOneField(
+        User, on_delete=models.CASCADE, primary_key=True,
+        related_name="confirmation", verbose_name="пользователь"
+    )
+    code_hash = models.CharField(verbose_name="хэш кода", max_length=128)
+    expires = models.DateTimeField(verbose_name="действует до")
+    attempts = models.PositiveSmallIntegerField(
+        verbose_name="неверные попытки", default=0
+    )
+
+    class Meta:
+        verbose_name = "код подтверждения"
+        verbose_name_plural = "коды подтверждения"
+        indexes = [
+            models.Index(fields=("expires",),
+                         name="confirmation_expires_idx")
+        ]
+
+    def __str__(self):
+        return f"{self.user_id}: {self.expires}"
+
+
+class OutboxMail(models.Model):
+    subject = models.CharField(verbose_name="тема", max_length=255)
+    body = models.TextField(verbose_name="текст")
+    recipient = models.EmailField(verbose_name="получатель")
+    created = models.DateTimeField(verbose_name="дата создания",
+                                   auto_now_add=True)
+    sent = models.DateTimeField(verbose_name="дата отправки",
+                                null=True, blank=True)
+    attempts = models.PositiveSmallIntegerField(
+        verbose_name="попытки отправки", default=0
+    )
+    error = models.TextField(verbose_name="последняя ошибка", blank=True)
+    claim = models.UUIDField(verbose_name="захвачено отправкой",
+                             null=True, blank=True, db_index=True)
+    claimed_until = models.DateTimeField(verbose_name="захвачено до",
+                                         null=True, blank=True)
+
+    class Meta:
+        verbose_name = "письмо"
+        verbose_name_plural = "письма"
+        indexes = [
+            models.Index(fields=("sent", "id"), name="outbox_pending_idx")
+        ]
+
+    def __str__(self):
+        return f"{self.recipient}: {self.subject}"
+
+
+class TokenRevocation(models.Model):
+    user_id = models.BigIntegerField(verbose_name="id пользователя")
+    revoked_at = models.DateTimeField(verbose_name="дата отзыва",
+                                      auto_now_add=True)
+
+    class Meta:
+        verbose_name = "отзыв токенов"
+        verbose_name_plural = "отзывы токенов"
+        indexes = [
+            models.Index(fields=("revoked_at",),
+                         name="token_revocation_date_idx")
+        ]
+
+    def __str__(self):
+        return f"{self.user_id}: {self.revoked_at}"
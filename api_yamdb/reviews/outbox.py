@@ -0,0 +1,113 @@
+import uuid
+from datetime import timedelta
+
+from django.conf import settings
+from django.core.mail import EmailMessage, get_connection
+from django.db.models import Q
+from django.utils import timezone
+
+from reviews.background import MAIL, schedule, schedule_later
+from reviews.models import OutboxMail
+
+
+def enqueue(subject, body, recipients):
+    """Сохраняет письма в очередь и будит фоновую отправку."""
+    OutboxMail.objects.bulk_create([
+        OutboxMail(subject=subject, body=body, recipient=recipient)
+        for recipient in recipients
+    ])
+    schedule(send_pending, queue=MAIL, eager=settings.MAIL_OUTBOX_EAGER)
+
+
+def deliver(batch):
+    """Отправляет пачку через одно соединение.
+
+    Возвращает False, если не удалось соединиться с почтовым сервером:
+    письма тут ни при чём, и попытка им не засчитывается.
+    """
+    connection = get_connection()
+    try:
+        connection.open()
+    except Exception as error:
+        for mail in batch:
+            mail.error = str(error)
+        return False
+    current = batch[0]
+    try:
+        for current in batch:
+            EmailMessage(
+                current.subject, current.body, settings.ADMIN_EMAIL,
+                [current.recipient], connection=connection,
+            ).send()
+            current.sent = timezone.now()
+            current.error = ""
+    except Exception as error:
+        current.attempts += 1
+        current.error = str(error)
+    finally:
+        connection.close()
+    return True
+
+
+def pending(now):
+    return OutboxMail.objects.filter(
+        Q(claimed_until__isnull=True) | Q(claimed_until__lt=now),
+        sent__isnull=True,
+        attempts__lt=settings.MAIL_OUTBOX_MAX_ATTEMPTS,
+    )
+
+
+def claim_batch(ids):
+    """Захватывает письма одним UPDATE и возвращает только захваченные.
+
+    Отправку запускает каждый процесс после регистрации и команда
+    `send_outbox_mail`, поэтому письмо, уже захваченное другим запуском,
+    пропускается. Захват истекает через MAIL_OUTBOX_CLAIM_TIMEOUT секунд,
+    если отправитель не завершил работу.
+    """
+    now = timezone.now()
+    claim = uuid.uuid4()
+    pending(now).filter(pk__in=ids).update(
+        claim=claim,
+        claimed_until=now
+        + timedelta(seconds=settings.MAIL_OUTBOX_CLAIM_TIMEOUT),
+    )
+    return list(OutboxMail.objects.filter(claim=claim).order_by("id"))
+
+
+def send_pending():
+    """Отправляет неотправленные письма пачками по MAIL_OUTBOX_BATCH_SIZE.
+
+    Пачка уходит через одно соединение с почтовым сервером. Письмо, на
+    котором отправка сорвалась, и остаток пачки остаются в очереди, пока
+    число попыток меньше MAIL_OUTBOX_MAX_ATTEMPTS. Если почтовый сервер
+    недоступен, отправка прекращается. В обоих случаях следующий запуск
+    ставится через MAIL_OUTBOX_RETRY_DELAY секунд.
+    """
+    last_id, sent, failed = 0, 0, False
+    while True:
+        ids = list(
+            pending(timezone.now()).filter(id__gt=last_id).order_by("id")
+            .values_list("pk", flat=True)[:settings.MAIL_OUTBOX_BATCH_SIZE]
+        )
+        if not ids:
+            break
+        last_id = ids[-1]
+        batch = claim_batch(ids)
+        if not batch:
+            continue
+        connected = deliver(batch)
+        for mail in batch:
+            mail.claim = mail.claimed_until = None
+        OutboxMail.objects.bulk_update(
+            batch, ("sent", "attempts", "error", "claim", "claimed_until")
+        )
+        delivered = sum(mail.sent is not None for mail in batch)
+        sent += delivered
+        failed = failed or delivered < len(batch)
+        if not connected:
+            break
+    if failed and settings.MAIL_OUTBOX_RETRY_DELAY is not None:
+        schedule_later(settings.MAIL_OUTBOX_RETRY_DELAY, send_pending,
+                       queue=MAIL)
+    return sent
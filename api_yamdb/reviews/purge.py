@@ -0,0 +1,94 @@
+from django.conf import settings
+from django.db import transaction
+from django.db.models import Sum
+from django.dispatch import Signal
+
+from reviews.background import PURGE, schedule
+from reviews.models import Comment, Review, Title, User
+
+# Отправляется после удаления отзывов и комментариев скрытого произведения
+# без сигналов моделей.
+title_purged = Signal()
+
+
+def delete_in_batches(queryset, size=None, quiet=False):
+    """Удаляет записи пачками, по умолчанию по CASCADE_DELETE_BATCH_SIZE.
+
+    Каждая пачка — отдельная короткая транзакция, так что блокировка
+    записи не держится на всё время удаления, а сигналы моделей
+    поддерживают рейтинг и счётчики, как при обычном удалении. С
+    `quiet=True` пачка удаляется одним DELETE без сигналов: так удаляются
+    записи, от которых ничего не останется.
+    """
+    size = size or settings.CASCADE_DELETE_BATCH_SIZE
+    deleted = 0
+    while True:
+        ids = list(queryset.order_by("pk").values_list("pk", flat=True)[:size])
+        if not ids:
+            return deleted
+        batch = queryset.model.objects.filter(pk__in=ids)
+        with transaction.atomic():
+            if quiet:
+                deleted += batch._raw_delete(batch.db)
+            else:
+                deleted += batch.delete()[0]
+
+
+def title_dependents(title):
+    comments = title.review.aggregate(total=Sum("comment_count"))["total"]
+    return title.review_count + (comments or 0)
+
+
+def user_dependents(user):
+    return (
+        Review.objects.filter(author=user).count()
+        + Comment.objects.filter(author=user).count()
+    )
+
+
+def purge_title(title_id):
+    # Произведение скрыто и удаляется целиком: пересчитывать по каждой
+    # строке его рейтинг, счётчики и таблицы лидеров незачем.
+    delete_in_batches(
+        Comment.objects.filter(review__title=title_id), quiet=True
+    )
+    delete_in_batches(Review.objects.filter(title=title_id), quiet=True)
+    title_purged.send(sender=Title, title_id=title_id)
+    Title.objects.filter(pk=title_id).delete()
+
+
+def purge_user(user_id):
+    delete_in_batches(Comment.objects.filter(author=user_id))
+    delete_in_batches(Comment.objects.filter(review__author=user_id))
+    delete_in_batches(Review.objects.filter(author=user_id))
+    User.objects.filter(pk=user_id).delete()
+
+
+def hide_title(title):
+    title.is_hidden = True
+    title.save(update_fields=["is_hidden"])
+    schedule(purge_title, title.pk, queue=PURGE,
+             eager=settings.CASCADE_DELETE_EAGER)
+
+
+def hide_user(user):
+    user.is_hidden = True
+    user.is_active = False
+    user.save(update_fields=["is_hidden", "is_active"])
+    schedule(purge_user, user.pk, queue=PURGE,
+             eager=settings.CASCADE_DELETE_EAGER)
+
+
+def purge_hidden():
+    """Дочищает скрытые записи, удаление которых не успело завершиться."""
+    titles = list(Title.objects.filter(is_hidden=True).values_list(
+        "pk", flat=True
+    ))
+    users = list(User.objects.filter(is_hidden=True).values_list(
+        "pk", flat=True
+    ))
+    for title_id in titles:
+        purge_title(title_id)
+    for user_id in users:
+        purge_user(user_id)
+    return len(titles), len(users)
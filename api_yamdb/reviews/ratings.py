@@ -0,0 +1,57 @@
+from django.db.models import (Avg, Case, Count, F, FloatField, OuterRef,
+                              Subquery, Sum, Value, When)
+from django.db.models.functions import Cast, Coalesce
+from django.dispatch import Signal
+
+from reviews.models import Review, Title
+
+# Отправляется после изменения агрегатов оценок произведения.
+rating_changed = Signal()
+# Отправляется после пересчёта агрегатов сразу многих произведений.
+ratings_rebuilt = Signal()
+
+
+def update_title_rating(title_id, score_delta, count_delta):
+    """Атомарно сдвигает агрегаты оценок произведения одним UPDATE."""
+    new_count = F("review_count") + count_delta
+    Title.objects.filter(pk=title_id).update(
+        score_sum=F("score_sum") + score_delta,
+        review_count=new_count,
+        rating=Case(
+            When(
+                review_count__gt=-count_delta,
+                then=Cast(F("score_sum") + score_delta, FloatField())
+                / new_count,
+            ),
+            default=Value(None),
+            output_field=FloatField(),
+        ),
+    )
+    rating_changed.send(sender=Title, title_id=title_id)
+
+
+def rebuild_title_ratings(titles=None):
+    """Пересчитывает агрегаты оценок по таблице отзывов."""
+    if titles is None:
+        titles = Title.objects.all()
+    reviews = (
+        Review.objects.filter(title=OuterRef("pk"))
+        .order_by()
+        .values("title")
+    )
+    updated = titles.update(
+        score_sum=Coalesce(
+            Subquery(reviews.annotate(value=Sum("score")).values("value")),
+            0,
+        ),
+        review_count=Coalesce(
+            Subquery(reviews.annotate(value=Count("pk")).values("value")),
+            0,
+        ),
+        rating=Subquery(
+            reviews.annotate(value=Avg("score")).values("value"),
+            output_field=FloatField(),
+        ),
+    )
+    ratings_rebuilt.send(sender=Title)
+    return updated
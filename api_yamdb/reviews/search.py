@@ -0,0 +1,67 @@
+import re
+
+from django.db import connection
+
+FTS_TABLE = "reviews_title_fts"
+WORD = re.compile(r"\w+", re.UNICODE)
+
+
+def is_available():
+    return connection.vendor == "sqlite"
+
+
+def index_title(title):
+    if not is_available():
+        return
+    if title.is_hidden:
+        unindex_title(title.pk)
+        return
+    with connection.cursor() as cursor:
+        cursor.execute(f"DELETE FROM {FTS_TABLE} WHERE rowid = %s", [title.pk])
+        cursor.execute(
+            f"INSERT INTO {FTS_TABLE} (rowid, name, description) "
+            "VALUES (%s, %s, %s)",
+            [title.pk, title.name, title.description],
+        )
+
+
+def unindex_title(title_id):
+    if not is_available():
+        return
+    with connection.cursor() as cursor:
+        cursor.execute(f"DELETE FROM {FTS_TABLE} WHERE rowid = %s", [title_id])
+
+
+def rebuild_index():
+    with connection.cursor() as cursor:
+        cursor.execute(f"DELETE FROM {FTS_TABLE}")
+        cursor.execute(
+            f"INSERT INTO {FTS_TABLE} (rowid, name, description) "
+            "SELECT id, name, description FROM reviews_title "
+            "WHERE NOT is_hidden"
+        )
+        return cursor.rowcount
+
+
+def match_expression(query):
+    """Слова запроса как префиксы, связанные через AND.
+
+    Пользовательский ввод не передаётся в MATCH напрямую: операторы и
+    кавычки FTS5 в нём дали бы синтаксическую ошибку.
+    """
+    words = WORD.findall(query)
+    return " ".join(f'"{word}"*' for word in words)
+
+
+def search_titles(query, limit):
+    """id произведений по релевантности (bm25, название весит больше)."""
+    expression = match_expression(query)
+    if not expression:
+        return []
+    with connection.cursor() as cursor:
+        cursor.execute(
+            f"SELECT rowid FROM {FTS_TABLE} WHERE {FTS_TABLE} MATCH %s "
+            f"ORDER BY bm25({FTS_TABLE}, 10.0, 1.0) LIMIT %s",
+            [expression, limit],
+        )
+        return [row[0] for row in cursor.fetchall()]
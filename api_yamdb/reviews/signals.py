@@ -0,0 +1,58 @@
+from django.db.models.signals import post_delete, post_init, post_save
+from django.dispatch import receiver
+
+from reviews.counters import update_comment_count
+from reviews.models import Comment, Review, Title
+from reviews.ratings import update_title_rating
+from reviews.search import index_title, unindex_title
+
+
+def remember_rating_state(instance):
+    instance._rating_state = (
+        instance.__dict__.get("title_id"),
+        instance.__dict__.get("score"),
+    )
+
+
+@receiver(post_init, sender=Review)
+def review_loaded(sender, instance, **kwargs):
+    remember_rating_state(instance)
+
+
+@receiver(post_save, sender=Review)
+def review_saved(sender, instance, created, **kwargs):
+    old_title_id, old_score = instance._rating_state
+    if created:
+        update_title_rating(instance.title_id, instance.score, 1)
+    elif old_title_id != instance.title_id:
+        update_title_rating(old_title_id, -old_score, -1)
+        update_title_rating(instance.title_id, instance.score, 1)
+    elif old_score != instance.score:
+        update_title_rating(instance.title_id, instance.score - old_score, 0)
+    remember_rating_state(instance)
+
+
+@receiver(post_delete, sender=Review)
+def review_deleted(sender, instance, **kwargs):
+    update_title_rating(instance.title_id, -instance.score, -1)
+
+
+@receiver(post_save, sender=Title)
+def title_saved(sender, instance, **kwargs):
+    index_title(instance)
+
+
+@receiver(post_delete, sender=Title)
+def title_deleted(sender, instance, **kwargs):
+    unindex_title(instance.pk)
+
+
+@receiver(post_save, sender=Comment)
+def comment_saved(sender, instance, created, **kwargs):
+    if created:
+        update_comment_count(instance.review_id, 1)
+
+
+@receiver(post_delete, sender=Comment)
+def comment_deleted(sender, instance, **kwargs):
+    update_comment_count(instance.review_id, -1)
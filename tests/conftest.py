@@ -31,4 +31,6 @@ assert get_version() < "4.0.0", "Пожалуйста, используйте в
 
 pytest_plugins = [
     "tests.fixtures.fixture_user",
+    "tests.fixtures.fixture_cache",
+    "tests.fixtures.fixture_mail",
 ]
@@ -0,0 +1,19 @@
+import pytest
+from django.core.cache import cache
+
+from api.v1.authentication import user_cache
+from api.v1.revocation import revocation_list
+from api.v1.throttling import memory_store
+
+
+@pytest.fixture(autouse=True)
+def clear_cache():
+    cache.clear()
+    user_cache.clear()
+    revocation_list.clear()
+    memory_store.clear()
+    yield
+    cache.clear()
+    user_cache.clear()
+    revocation_list.clear()
+    memory_store.clear()
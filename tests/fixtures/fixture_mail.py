@@ -0,0 +1,7 @@
+import pytest
+
+
+@pytest.fixture(autouse=True)
+def send_mail_eagerly(settings):
+    settings.MAIL_OUTBOX_EAGER = True
+    settings.MAIL_OUTBOX_RETRY_DELAY = None
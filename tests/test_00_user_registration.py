@@ -2,9 +2,20 @@ from http import HTTPStatus
 
 import pytest
 from django.core import mail
+from django.core.management import call_command
+from django.db import connection
 from django.db.utils import IntegrityError
-
+from django.test.utils import CaptureQueriesContext
+from rest_framework.test import APIClient
+from rest_framework_simplejwt.tokens import AccessToken
+
+from api.v1.throttling import MemoryBucketStore
+from reviews import outbox
+from reviews.confirmation import store_code
+from reviews.models import ConfirmationCode, OutboxMail, TokenRevocation
+from reviews.outbox import claim_batch
 from tests.utils import (
+    create_catalog,
     invalid_data_for_user_patch_and_creation,
     invalid_data_for_username_and_email_fields,
 )
@@ -326,3 +337,277 @@ class Test00UserRegistration:
             "пользователя, созданного администратором,  возвращает ответ "
             "со статусом 200."
         )
+
+    def test_00_signup_mail_outbox(self, client, settings, monkeypatch):
+        settings.EMAIL_BACKEND = "django.core.mail.backends.smtp.EmailBackend"
+        settings.EMAIL_HOST = "127.0.0.1"
+        settings.EMAIL_PORT = 1
+        settings.MAIL_OUTBOX_RETRY_DELAY = 60
+        retries = []
+        monkeypatch.setattr(
+            outbox, "schedule_later",
+            lambda delay, task, *args, **kwargs: retries.append(delay),
+        )
+        data = {"email": "outbox@yamdb.fake", "username": "outbox"}
+        response = client.post("/api/v1/auth/signup/", data=data)
+        assert response.status_code == 200, (
+            "Проверьте, что регистрация не зависит от доступности почтового "
+            "сервера."
+        )
+        queued = OutboxMail.objects.get(recipient=data["email"])
+        assert (queued.sent, queued.attempts) == (None, 0), (
+            "Проверьте, что неотправленное письмо остаётся в очереди, а "
+            "недоступность сервера не засчитывается письму как попытка."
+        )
+        assert queued.error and retries == [60], (
+            "Проверьте, что неудачная отправка повторяется по таймеру."
+        )
+
+        settings.EMAIL_BACKEND = "django.core.mail.backends.locmem.EmailBackend"
+        outbox_before = len(mail.outbox)
+        call_command("send_outbox_mail")
+        queued.refresh_from_db()
+        assert queued.sent is not None, (
+            "Проверьте, что команда `send_outbox_mail` повторяет отправку."
+        )
+        assert [message.to for message in mail.outbox[outbox_before:]] == [
+            [data["email"]]
+        ]
+
+    def test_00_outbox_skips_claimed_mail(self, settings):
+        settings.EMAIL_BACKEND = "django.core.mail.backends.locmem.EmailBackend"
+        first = OutboxMail.objects.create(
+            subject="тема", body="текст", recipient="first@yamdb.fake"
+        )
+        second = OutboxMail.objects.create(
+            subject="тема", body="текст", recipient="second@yamdb.fake"
+        )
+        assert claim_batch([first.id]) == [first], (
+            "Проверьте, что письмо захватывается перед отправкой."
+        )
+        assert claim_batch([first.id]) == []
+        outbox_before = len(mail.outbox)
+        call_command("send_outbox_mail")
+        assert [message.to for message in mail.outbox[outbox_before:]] == [
+            [second.recipient]
+        ], "Проверьте, что письмо, захваченное другим запуском, не дублируется."
+        first.refresh_from_db()
+        assert first.sent is None and first.claim is not None
+
+    def test_00_signup_single_upsert(self, client, django_user_model):
+        data = {"email": "upsert@yamdb.fake", "username": "upsert"}
+        url = "/api/v1/auth/signup/"
+
+        def user_queries():
+            with CaptureQueriesContext(connection) as context:
+                response = client.post(url, data=data)
+            assert response.status_code == 200
+            return [
+                query["sql"].split()[0] for query in context.captured_queries
+                if '"reviews_user"' in query["sql"]
+            ]
+
+        assert user_queries() == ["SELECT", "INSERT"], (
+            "Проверьте, что регистрация не проверяет уникальность запросами."
+        )
+        assert user_queries() == ["SELECT"], (
+            "Проверьте, что повторная регистрация не пишет в таблицу "
+            "пользователей."
+        )
+        response = client.post(
+            url, data={"email": data["email"], "username": "other"}
+        )
+        assert response.status_code == 400
+        assert "email" in response.json()
+
+    def test_00_authenticated_user_cached(self, admin_client, user):
+        url = "/api/v1/titles/"
+
+        def user_selects():
+            with CaptureQueriesContext(connection) as context:
+                assert admin_client.get(url).status_code == 200
+            return [
+                query["sql"] for query in context.captured_queries
+                if query["sql"].startswith("SELECT")
+                and 'FROM "reviews_user"' in query["sql"]
+            ]
+
+        assert len(user_selects()) == 1
+        assert user_selects() == [], (
+            "Проверьте, что пользователь из токена берётся из кэша процесса."
+        )
+        user_client = APIClient()
+        user_client.credentials(
+            HTTP_AUTHORIZATION=f"Bearer {AccessToken.for_user(user)}"
+        )
+        assert user_client.get("/api/v1/users/").status_code == 403
+        response = admin_client.patch(
+            f"/api/v1/users/{user.username}/", data={"role": "admin"}
+        )
+        assert response.status_code == 200
+        assert user_client.get("/api/v1/users/").status_code == 200, (
+            "Проверьте, что смена роли сбрасывает пользователя в кэше."
+        )
+
+    def test_00_token_has_role_claims(self, client, user):
+        store_code(user.pk, "code")
+        response = client.post("/api/v1/auth/token/", data={
+            "username": user.username, "confirmation_code": "code"
+        })
+        token = AccessToken(response.json()["token"])
+        assert (token["username"], token["role"]) == (user.username, "user")
+
+    def test_00_demoted_user_tokens_revoked(
+        self, admin_client, moderator, moderator_client
+    ):
+        url = "/api/v1/titles/"
+        assert moderator_client.get(url).status_code == 200
+        with CaptureQueriesContext(connection) as context:
+            assert moderator_client.get(url).status_code == 200
+        assert not [
+            query for query in context.captured_queries
+            if "reviews_tokenrevocation" in query["sql"]
+        ], "Проверьте, что список отозванных токенов не читается повторно."
+
+        response = admin_client.patch(
+            f"/api/v1/users/{moderator.username}/", data={"role": "user"}
+        )
+        assert response.status_code == 200
+        assert moderator_client.get(url).status_code == 401, (
+            "Проверьте, что токены пользователя отзываются при понижении "
+            "роли."
+        )
+        store_code(moderator.pk, "code")
+        response = APIClient().post("/api/v1/auth/token/", data={
+            "username": moderator.username, "confirmation_code": "code"
+        })
+        client = APIClient()
+        client.credentials(
+            HTTP_AUTHORIZATION=f"Bearer {response.json()['token']}"
+        )
+        assert client.get(url).status_code == 200, (
+            "Проверьте, что токен, выпущенный после отзыва, действует."
+        )
+
+    def test_00_revocation_polled_without_cache_version(
+        self, moderator, moderator_client, settings
+    ):
+        url = "/api/v1/titles/"
+        assert moderator_client.get(url).status_code == 200
+        TokenRevocation.objects.create(user_id=moderator.pk)
+        assert moderator_client.get(url).status_code == 200
+        settings.TOKEN_REVOCATION_POLL_INTERVAL = 0
+        assert moderator_client.get(url).status_code == 401, (
+            "Проверьте, что отзывы из других процессов дочитываются "
+            "по таймеру, даже если версия в кэше не изменилась."
+        )
+
+    def test_00_deactivated_user_tokens_revoked(
+        self, user, user_client, moderator, django_user_model
+    ):
+        url = "/api/v1/users/me/"
+        assert user_client.get(url).status_code == 200
+        user = django_user_model.objects.get(pk=user.pk)
+        user.is_active = False
+        user.save()
+        moderator = django_user_model.objects.get(pk=moderator.pk)
+        moderator.is_hidden = True
+        moderator.save()
+        assert set(TokenRevocation.objects.values_list(
+            "user_id", flat=True
+        )) == {user.pk, moderator.pk}, (
+            "Проверьте, что токены отзываются, когда пользователя "
+            "деактивируют или скрывают перед удалением."
+        )
+        assert user_client.get(url).status_code == 401
+
+    def test_00_confirmation_codes_hashed_and_expiring(
+        self, client, user, settings
+    ):
+        url = "/api/v1/auth/token/"
+        settings.CONFIRMATION_CODE_MAX_ATTEMPTS = 2
+        store_code(user.pk, "code")
+        assert user.confirmation.code_hash != "code"
+        data = {"username": user.username, "confirmation_code": "code"}
+        wrong = {"username": user.username, "confirmation_code": "wrong"}
+        with CaptureQueriesContext(connection) as context:
+            assert client.post(url, data=wrong).status_code == 400
+        assert context.captured_queries[0]["sql"].count("SELECT") == 1
+        assert client.post(url, data=wrong).status_code == 400
+        assert client.post(url, data=data).status_code == 400, (
+            "Проверьте, что код блокируется после исчерпания попыток."
+        )
+
+        store_code(user.pk, "code")
+        assert client.post(url, data=data).status_code == 200
+        assert client.post(url, data=data).status_code == 400, (
+            "Проверьте, что код подтверждения одноразовый."
+        )
+
+        settings.CONFIRMATION_CODE_TIMEOUT = -1
+        store_code(user.pk, "code")
+        assert client.post(url, data=data).status_code == 400, (
+            "Проверьте, что просроченный код не принимается."
+        )
+        call_command("purge_confirmation_codes")
+        assert not ConfirmationCode.objects.exists()
+
+    @pytest.mark.parametrize("store", ("memory", "cache"))
+    def test_00_throttles_reject_before_db(
+        self, client, user_client, settings, store
+    ):
+        settings.THROTTLE_STORE = store
+        settings.REST_FRAMEWORK = {
+            **settings.REST_FRAMEWORK,
+            "DEFAULT_THROTTLE_RATES": {
+                "signup": "2/hour", "token": "30/min",
+                "token_username": "1/min", "review": "1/min",
+            },
+        }
+        url = "/api/v1/auth/signup/"
+        for idx in range(2):
+            data = {"email": f"t{idx}@yamdb.fake", "username": f"t{idx}"}
+            assert client.post(url, data=data).status_code == 200
+        with CaptureQueriesContext(connection) as context:
+            response = client.post(url, data={
+                "email": "t2@yamdb.fake", "username": "t2"
+            }, HTTP_X_FORWARDED_FOR="203.0.113.7")
+        assert response.status_code == 429, (
+            "Проверьте, что регистрация ограничена по IP и заголовок "
+            "`X-Forwarded-For` клиента не обходит лимит."
+        )
+        assert not context.captured_queries
+
+        url = "/api/v1/auth/token/"
+        data = {"username": "t0", "confirmation_code": "wrong"}
+        assert client.post(url, data=data).status_code == 400
+        assert client.post(url, data=data).status_code == 429, (
+            "Проверьте, что подбор кода к пользователю ограничен."
+        )
+
+        title = create_catalog(2)
+        for expected in (201, 429):
+            response = user_client.post(
+                f"/api/v1/titles/{title[0].id}/reviews/",
+                data={"text": "отзыв", "score": 5},
+            )
+            assert response.status_code == expected, (
+                "Проверьте, что публикация отзывов ограничена по пользователю."
+            )
+            title = title[1:]
+
+    def test_00_throttle_eviction_keeps_draining_buckets(self, settings):
+        settings.THROTTLE_MAX_BUCKETS = 1
+        store = MemoryBucketStore()
+        now = [0]
+        store.timer = lambda: now[0]
+        rate = 1 / 60
+        assert store.consume("victim", 1, rate) == 0
+        assert store.consume("other", 1, rate) > 0, (
+            "Проверьте, что новый ключ не вытесняет пополняющуюся корзину."
+        )
+        assert store.consume("victim", 1, rate) > 0
+        now[0] = 60
+        assert store.consume("other", 1, rate) == 0, (
+            "Проверьте, что наполнившаяся корзина вытесняется."
+        )
@@ -2,7 +2,12 @@ from http import HTTPStatus
 
 import pytest
 
-from tests.utils import check_pagination, invalid_data_for_user_patch_and_creation
+from reviews.models import Comment, Review
+from tests.utils import (
+    check_pagination,
+    create_catalog,
+    invalid_data_for_user_patch_and_creation,
+)
 
 
 @pytest.mark.django_db(transaction=True)
@@ -516,3 +521,31 @@ class Test01UserAPI:
             "Проверьте, что PATCH-запрос к `/api/v1/users/me/` с ключом "
             "`role` не изменяет роль пользователя."
         )
+
+    def test_11_users_username_delete_in_background(
+        self, admin_client, admin, user, settings
+    ):
+        settings.CASCADE_DELETE_ASYNC_THRESHOLD = 0
+        settings.CASCADE_DELETE_BATCH_SIZE = 2
+        settings.CASCADE_DELETE_EAGER = True
+        title = create_catalog(1)[0]
+        review = Review.objects.create(
+            title=title, author=user, text="отзыв", score=4
+        )
+        review.comment.create(author=admin, text="комментарий")
+        Review.objects.create(
+            title=title, author=admin, text="отзыв", score=8
+        ).comment.create(author=user, text="комментарий")
+
+        response = admin_client.delete(f"/api/v1/users/{user.username}/")
+        assert response.status_code == 202, (
+            "Проверьте, что удаление пользователя с большим числом отзывов "
+            "возвращает ответ со статусом 202."
+        )
+        assert not Review.objects.filter(author=user.id).exists()
+        assert not Comment.objects.filter(author=user.id).exists()
+        title.refresh_from_db()
+        assert (title.review_count, title.rating) == (1, 8), (
+            "Проверьте, что рейтинг пересчитывается при фоновом удалении "
+            "отзывов пользователя."
+        )
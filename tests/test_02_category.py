@@ -2,10 +2,12 @@ from http import HTTPStatus
 
 import pytest
 
+from reviews.models import Review
 from tests.utils import (
     check_name_and_slug_patterns,
     check_pagination,
     check_permissions,
+    create_catalog,
     create_categories,
 )
 
@@ -134,3 +136,26 @@ class Test02CategoryAPI:
         check_permissions(
             moderator_client, url, data, "модератора", categories, HTTPStatus.FORBIDDEN
         )
+
+    def test_06_category_top(self, client, admin, user, settings):
+        settings.LEADERBOARD_MIN_VOTES = 2
+        settings.LEADERBOARD_SIZE = 2
+        first, second, third = create_catalog(3)
+        for title, scores in ((first, (5, 7)), (second, (9, 9)),
+                              (third, (4, 1))):
+            for author, score in zip((admin, user), scores):
+                Review.objects.create(
+                    title=title, author=author, text="отзыв", score=score
+                )
+        url = "/api/v1/categories/film/top/"
+        response = client.get(url)
+        assert response.status_code == 200, (
+            f"Проверьте, что эндпоинт `{url}` доступен без авторизации."
+        )
+        assert [item["id"] for item in response.json()] == [
+            second.id, first.id
+        ], (
+            "Проверьте, что таблица лидеров категории отдаёт произведения "
+            "с наибольшим рейтингом."
+        )
+        assert client.get("/api/v1/categories/unknown/top/").status_code == 404
@@ -1,11 +1,18 @@
 from http import HTTPStatus
 
 import pytest
+from django.core.cache import cache
+from django.core.management import call_command
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
 
+from api.v1.leaderboards import GENRE, LOCK_KEY, leaderboard_key
+from reviews.models import Review
 from tests.utils import (
     check_name_and_slug_patterns,
     check_pagination,
     check_permissions,
+    create_catalog,
     create_genre,
 )
 
@@ -132,3 +139,77 @@ class Test03GenreAPI:
         check_permissions(
             moderator_client, url, data, "модератора", genres, HTTPStatus.FORBIDDEN
         )
+
+    def test_06_genre_top(self, client, admin, user, settings):
+        settings.LEADERBOARD_MIN_VOTES = 2
+        settings.LEADERBOARD_SIZE = 2
+        first, second, third = create_catalog(3)
+        for title, scores in ((first, (5, 7)), (second, (9, 9)),
+                              (third, (4, 1))):
+            for author, score in zip((admin, user), scores):
+                Review.objects.create(
+                    title=title, author=author, text="отзыв", score=score
+                )
+
+        def top(url):
+            response = client.get(url)
+            assert response.status_code == 200, (
+                f"Проверьте, что эндпоинт `{url}` доступен без авторизации."
+            )
+            return [item["id"] for item in response.json()]
+
+        assert top("/api/v1/genres/drama/top/") == [second.id, first.id]
+
+        Review.objects.filter(title=third, author=user).get().delete()
+        Review.objects.create(
+            title=third, author=user, text="отзыв", score=10
+        )
+        with CaptureQueriesContext(connection) as context:
+            ids = top("/api/v1/genres/drama/top/")
+        assert ids == [second.id, third.id], (
+            "Проверьте, что таблица лидеров обновляется при записи отзывов."
+        )
+        assert not any(
+            "GROUP BY" in query["sql"] for query in context.captured_queries
+        ), "Таблица лидеров не должна строиться агрегацией отзывов."
+
+        review = Review.objects.filter(title=second, author=admin).get()
+        review.score = 1
+        review.save()
+        assert top("/api/v1/genres/drama/top/") == [third.id, first.id], (
+            "Проверьте, что таблица лидеров пересобирается, когда "
+            "произведение опускается ниже её границы."
+        )
+        assert client.get("/api/v1/genres/unknown/top/").status_code == 404
+
+    def test_07_genre_top_after_bulk_and_concurrent_updates(
+        self, client, admin, user, settings
+    ):
+        settings.LEADERBOARD_MIN_VOTES = 2
+        first, second = create_catalog(2)
+        for title, scores in ((first, (1, 1)), (second, (2, 2))):
+            for author, score in zip((admin, user), scores):
+                Review.objects.create(
+                    title=title, author=author, text="отзыв", score=score
+                )
+        url = "/api/v1/genres/drama/top/"
+        assert [item["id"] for item in client.get(url).json()] == [
+            second.id, first.id
+        ]
+
+        Review.objects.filter(title=first).update(score=9)
+        call_command("rebuild_ratings")
+        assert [item["id"] for item in client.get(url).json()] == [
+            first.id, second.id
+        ], (
+            "Проверьте, что `rebuild_ratings` сбрасывает таблицы лидеров."
+        )
+
+        key = leaderboard_key(GENRE, "drama")
+        cache.add(LOCK_KEY.format(key), 1)
+        Review.objects.filter(title=second, author=admin).get().delete()
+        assert leaderboard_key(GENRE, "drama") != key, (
+            "Проверьте, что таблица, которую переставляет другой запрос, "
+            "сбрасывается, а не теряет изменение."
+        )
+        assert [item["id"] for item in client.get(url).json()] == [first.id]
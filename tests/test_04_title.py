@@ -1,10 +1,19 @@
+import re
 from http import HTTPStatus
 
 import pytest
+from django.core.cache import cache
+from django.core.management import call_command
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
 
+from reviews.background import run
+from reviews.models import Genre, Review, Title
 from tests.utils import (
     check_pagination,
     check_permissions,
+    count_queries,
+    create_catalog,
     create_categories,
     create_genre,
     create_titles,
@@ -328,3 +337,434 @@ class Test04TitleAPI:
         check_permissions(
             moderator_client, url, data, "модератора", titles, HTTPStatus.FORBIDDEN
         )
+
+    def test_06_title_write_response_matches_read(self, admin_client):
+        genres = create_genre(admin_client)
+        categories = create_categories(admin_client)
+        data = {
+            "name": "Чудо юдо",
+            "year": 1999,
+            "genre": [genres[1]["slug"], genres[0]["slug"], genres[1]["slug"]],
+            "category": categories[0]["slug"],
+            "description": "Описание",
+        }
+        response = admin_client.post("/api/v1/titles/", data=data)
+        assert response.status_code == HTTPStatus.CREATED
+        created = response.json()
+        detail = admin_client.get(f'/api/v1/titles/{created["id"]}/').json()
+        assert created["genre"] == detail["genre"], (
+            "Проверьте, что ответ на POST-запрос к `/api/v1/titles/` "
+            "содержит жанры без повторов и в том же порядке, что и GET."
+        )
+        assert len(created["genre"]) == 2
+
+    def test_07_titles_ordering_has_tie_breaker(self, admin_client):
+        create_titles(admin_client)
+        for ordering in ("-rating", "review_count", "year"):
+            url = f"/api/v1/titles/?ordering={ordering}"
+            with CaptureQueriesContext(connection) as context:
+                response = admin_client.get(url)
+            assert response.status_code == HTTPStatus.OK
+            orderings = [
+                query["sql"].rsplit("ORDER BY", 1)[1]
+                for query in context.captured_queries
+                if 'FROM "reviews_title"' in query["sql"]
+                and "ORDER BY" in query["sql"]
+            ]
+            assert orderings and all(
+                '"reviews_title"."id"' in clause for clause in orderings
+            ), (
+                f"Проверьте, что сортировка `?ordering={ordering}` "
+                "дополняется уникальным полем `id`."
+            )
+
+    def test_08_titles_search_ignores_cursor(self, admin_client, client):
+        create_titles(admin_client)
+        response = client.get("/api/v1/titles/search/?q=a&cursor=&limit=1")
+        assert response.status_code == HTTPStatus.OK, (
+            "Проверьте, что `/api/v1/titles/search/` с параметром `cursor` "
+            "возвращает ответ со статусом 200."
+        )
+        data = response.json()
+        assert "count" in data and len(data["results"]) <= 1, (
+            "Проверьте, что поиск по произведениям пагинируется через "
+            "`limit` и `offset`."
+        )
+
+    def test_09_titles_list_constant_queries(self, client):
+        create_catalog(6)
+        one = count_queries(client, "/api/v1/titles/?limit=1")
+        cache.clear()
+        many = count_queries(client, "/api/v1/titles/?limit=6")
+        assert one == many, (
+            "Проверьте, что количество SQL-запросов при GET-запросе к "
+            "`/api/v1/titles/` не зависит от размера страницы."
+        )
+
+    def test_10_title_rating_maintained(self, admin, user):
+        title = create_catalog(1)[0]
+        review = Review.objects.create(
+            title=title, author=admin, text="отзыв", score=4
+        )
+        Review.objects.create(title=title, author=user, text="отзыв", score=8)
+        title.refresh_from_db()
+        assert (title.review_count, title.score_sum, title.rating) == (
+            2, 12, 6
+        ), "Проверьте, что рейтинг обновляется при создании отзыва."
+
+        review.score = 10
+        review.save()
+        title.refresh_from_db()
+        assert title.rating == 9, (
+            "Проверьте, что рейтинг обновляется при изменении оценки."
+        )
+
+        user.delete()
+        title.refresh_from_db()
+        assert (title.review_count, title.rating) == (1, 10), (
+            "Проверьте, что рейтинг обновляется при каскадном удалении "
+            "отзывов пользователя."
+        )
+
+        review.delete()
+        title.refresh_from_db()
+        assert (title.review_count, title.score_sum, title.rating) == (
+            0, 0, None
+        ), "Проверьте, что рейтинг сбрасывается после удаления всех отзывов."
+
+    def test_11_rebuild_ratings(self, admin, user):
+        title, empty_title = create_catalog(2)
+        Review.objects.create(title=title, author=admin, text="отзыв", score=3)
+        Review.objects.create(title=title, author=user, text="отзыв", score=6)
+        Title.objects.update(score_sum=100, review_count=7, rating=1)
+        call_command("rebuild_ratings")
+        title.refresh_from_db()
+        empty_title.refresh_from_db()
+        assert (title.review_count, title.score_sum, title.rating) == (
+            2, 9, 4.5
+        ), "Проверьте, что команда `rebuild_ratings` пересчитывает рейтинг."
+        assert (empty_title.review_count, empty_title.rating) == (0, None), (
+            "Проверьте, что команда `rebuild_ratings` сбрасывает рейтинг "
+            "произведений без отзывов."
+        )
+
+    def test_12_anonymous_catalog_cached(self, client, admin_client):
+        create_catalog(2)
+        url = "/api/v1/titles/"
+        first = client.get(url).json()
+        assert count_queries(client, url) == 0, (
+            "Проверьте, что повторный GET-запрос анонимного пользователя к "
+            f"`{url}` обслуживается из кэша."
+        )
+        assert client.get(url).json() == first
+
+        Genre.objects.filter(slug="drama").first().delete()
+        response = client.get(url).json()
+        assert response["results"][0]["genre"] == [
+            {"name": "Комедия", "slug": "comedy"}
+        ], "Проверьте, что кэш сбрасывается при изменении жанров."
+
+        admin_client.patch(
+            f"{url}{response['results'][0]['id']}/", data={"name": "Новое"}
+        )
+        assert client.get(url).json()["results"][0]["name"] == "Новое", (
+            "Проверьте, что кэш сбрасывается при изменении произведения."
+        )
+
+        page = f"{url}?limit=1"
+        client.get(page)
+        data = client.get(page, HTTP_HOST="mirror.yamdb.fake").json()
+        assert data["next"].startswith("http://mirror.yamdb.fake/"), (
+            "Проверьте, что закэшированные абсолютные ссылки не отдаются "
+            "запросам к другому хосту."
+        )
+
+    def test_13_titles_cursor_pagination(self, client):
+        titles = create_catalog(7)
+        url = "/api/v1/titles/?cursor=&limit=3"
+        seen = []
+        while url:
+            data = client.get(url).json()
+            assert "count" not in data, (
+                "Проверьте, что в режиме курсорной пагинации не считается "
+                "общее количество записей."
+            )
+            seen.extend(item["id"] for item in data["results"])
+            url = data["next"]
+        assert seen == [title.id for title in titles], (
+            "Проверьте, что курсорная пагинация `/api/v1/titles/?cursor=` "
+            "обходит все произведения по порядку id."
+        )
+
+    def test_14_cached_count(self, admin_client, settings):
+        create_catalog(3)
+        url = "/api/v1/titles/?limit=1"
+        count_queries(admin_client, "/api/v1/genres/")
+        first = count_queries(admin_client, url)
+        second = count_queries(admin_client, url)
+        assert second == first - 1, (
+            "Проверьте, что количество записей для пагинации `/api/v1/titles/` "
+            "берётся из кэша при повторном запросе."
+        )
+        Title.objects.create(name="Ещё", year=2020, description="описание")
+        assert admin_client.get(url).json()["count"] == 4, (
+            "Проверьте, что кэш количества записей сбрасывается при "
+            "добавлении произведения."
+        )
+
+        settings.PAGINATION_COUNT_ESTIMATE_THRESHOLD = 4
+        Title.objects.create(name="Ещё одно", year=2021, description="описание")
+        data = admin_client.get(url).json()
+        assert (data["count"], data.get("count_estimated")) == (4, True), (
+            "Проверьте, что количество выше порога отдаётся как оценка."
+        )
+
+    def test_15_titles_ordering(self, client, admin, user):
+        low, high, empty = create_catalog(3)
+        Review.objects.create(title=low, author=admin, text="отзыв", score=2)
+        Review.objects.create(title=high, author=admin, text="отзыв", score=9)
+        Review.objects.create(title=high, author=user, text="отзыв", score=7)
+        expected = {
+            "-rating": [high.id, low.id, empty.id],
+            "-review_count,id": [high.id, low.id, empty.id],
+            "-year": [empty.id, high.id, low.id],
+            "name": [low.id, high.id, empty.id],
+        }
+        for ordering, ids in expected.items():
+            data = client.get(f"/api/v1/titles/?ordering={ordering}").json()
+            assert [item["id"] for item in data["results"]] == ids, (
+                "Проверьте, что `/api/v1/titles/` поддерживает сортировку "
+                f"`?ordering={ordering}`."
+            )
+
+    def test_16_titles_full_text_search(self, client):
+        first, second, third = create_catalog(3)
+        first.name = "Мастер и Маргарита"
+        first.save()
+        second.description = "Роман о мастере и его любви"
+        second.save()
+        third.delete()
+        data = client.get("/api/v1/titles/search/?q=мастер").json()
+        assert [item["id"] for item in data["results"]] == [
+            first.id, second.id
+        ], (
+            "Проверьте, что `/api/v1/titles/search/?q=` ищет по названию и "
+            "описанию и ставит совпадения в названии выше."
+        )
+        data = client.get('/api/v1/titles/search/?q="мастер*(').json()
+        assert data["count"] == 2, (
+            "Проверьте, что спецсимволы FTS5 в запросе не приводят к ошибке."
+        )
+        call_command("rebuild_search_index")
+        data = client.get("/api/v1/titles/search/?q=Произведение").json()
+        assert data["count"] == 1
+
+    def test_17_autocomplete(self, client, settings):
+        titles = create_catalog(2)
+        titles[0].name = "Крепкий орешек"
+        titles[0].save()
+        url = "/api/v1/autocomplete/?q={}"
+        assert client.get(url.format("ореш")).json() == [
+            {"type": "title", "id": titles[0].id, "name": "Крепкий орешек"}
+        ], "Проверьте, что автодополнение ищет по началу любого слова."
+        assert {item["id"] for item in client.get(url.format("д")).json()} == {
+            "drama"
+        }
+        Genre.objects.create(name="Детектив", slug="detective")
+        titles[1].delete()
+        found = client.get(url.format("д")).json()
+        assert {item["id"] for item in found} == {"drama", "detective"}, (
+            "Проверьте, что индекс автодополнения обновляется при записи."
+        )
+        assert client.get(url.format("произв")).json() == []
+        assert len(client.get(url.format("") + "&limit=1").json()) == 0
+
+        settings.AUTOCOMPLETE_MAX_AGE = 0
+        Title.objects.filter(pk=titles[0].pk).update(name="Орешник")
+        assert [item["name"] for item in client.get(
+            url.format("орешн")
+        ).json()] == ["Орешник"], (
+            "Проверьте, что индекс автодополнения перестраивается по "
+            "возрасту, даже если версия в кэше не менялась."
+        )
+
+    def test_18_titles_facets(self, admin_client):
+        create_catalog(12)
+        Title.objects.create(name="Без жанра", year=1999, description="-")
+        url = "/api/v1/titles/?limit=1&facets=genre,category,year"
+        with CaptureQueriesContext(connection) as context:
+            data = admin_client.get(url).json()
+        facets = data["facets"]
+        assert facets["genre"] == [
+            {"slug": "comedy", "count": 12}, {"slug": "drama", "count": 12}
+        ]
+        assert facets["category"] == [{"slug": "film", "count": 12}]
+        assert facets["year"] == [
+            {"from": 1990, "to": 1999, "count": 1},
+            {"from": 2000, "to": 2009, "count": 10},
+            {"from": 2010, "to": 2019, "count": 2},
+        ], "Проверьте, что фасеты по годам считаются по десятилетиям."
+        assert len(context.captured_queries) <= 8
+        data = admin_client.get(
+            "/api/v1/titles/?year=2003&facets=category,unknown"
+        ).json()
+        assert data["facets"] == {"category": [{"slug": "film", "count": 1}]}
+        assert "facets" not in admin_client.get("/api/v1/titles/").json()
+
+    def test_19_titles_multi_genre_filter(self, admin_client):
+        both, drama_only, third = create_catalog(3)
+        drama_only.genre.set(["drama"])
+        Title.objects.filter(pk=third.pk).update(category=None)
+
+        def ids(query):
+            data = admin_client.get(f"/api/v1/titles/?{query}").json()
+            return [item["id"] for item in data["results"]]
+
+        assert ids("genre=drama,comedy") == [both.id, drama_only.id, third.id], (
+            "Проверьте, что фильтр по нескольким жанрам не дублирует "
+            "произведения."
+        )
+        assert ids("genre=drama,comedy&genre_mode=all") == [both.id, third.id]
+        assert ids("genre=comedy&year_min=2001&year_max=2002") == [third.id]
+        assert ids("category=film,book") == [both.id, drama_only.id]
+        assert ids("search=dra") == [both.id, drama_only.id, third.id]
+
+    def test_20_list_endpoints_use_indexes(self, admin_client, admin):
+        titles = create_catalog(3)
+        review = Review.objects.create(
+            title=titles[0], author=admin, text="отзыв", score=5
+        )
+        review.comment.create(author=admin, text="комментарий")
+        urls = (
+            "/api/v1/titles/",
+            "/api/v1/titles/?year_min=2001",
+            "/api/v1/titles/?year_max=2001",
+            "/api/v1/titles/?search=dr",
+            "/api/v1/titles/?ordering=year",
+            "/api/v1/titles/?ordering=name",
+            "/api/v1/titles/?ordering=-review_count",
+            "/api/v1/titles/?genre=drama",
+            "/api/v1/titles/?genre=drama,comedy&genre_mode=all",
+            "/api/v1/titles/?category=film&year=2001",
+            f"/api/v1/titles/?name={titles[0].name}",
+            "/api/v1/titles/?ordering=-rating",
+            f"/api/v1/titles/{titles[0].id}/reviews/",
+            f"/api/v1/titles/{titles[0].id}/reviews/{review.id}/comments/",
+        )
+        for url in urls:
+            with CaptureQueriesContext(connection) as context:
+                admin_client.get(url)
+            for query in context.captured_queries:
+                with connection.cursor() as cursor:
+                    cursor.execute(f"EXPLAIN QUERY PLAN {query['sql']}")
+                    plan = [row[-1] for row in cursor.fetchall()]
+                # Обход произведений в порядке первичного ключа с LIMIT
+                # останавливается на размере страницы: так SQLite отдаёт
+                # каталог без фильтров и с диапазоном лет, не сортируя его.
+                key_order = re.search(
+                    r'ORDER BY "reviews_title"\."id" ASC LIMIT', query["sql"]
+                )
+                full_scans = [
+                    step for step in plan
+                    if step.startswith("SCAN") and "INDEX" not in step
+                    and not (key_order and step == "SCAN reviews_title")
+                ]
+                assert not full_scans, (
+                    f"Проверьте, что запросы эндпоинта `{url}` используют "
+                    f"индексы. План `{query['sql']}`: {plan}"
+                )
+
+    def test_21_title_detail_includes_reviews(self, client, admin, user):
+        title = create_catalog(1)[0]
+        old = Review.objects.create(
+            title=title, author=admin, text="старый", score=5
+        )
+        new = Review.objects.create(
+            title=title, author=user, text="новый", score=7
+        )
+        for _ in range(3):
+            old.comment.create(author=user, text="комментарий")
+        url = f"/api/v1/titles/{title.id}/?include=reviews&reviews_limit=2"
+        with CaptureQueriesContext(connection) as context:
+            data = client.get(url).json()
+        assert [
+            (item["id"], item["author"], item["comment_count"])
+            for item in data["reviews"]
+        ] == [(new.id, user.username, 0), (old.id, admin.username, 3)], (
+            "Проверьте, что `?include=reviews` встраивает последние отзывы "
+            "с авторами и количеством комментариев."
+        )
+        assert len(context.captured_queries) <= 3
+        new.comment.create(author=admin, text="комментарий")
+        data = client.get(url).json()
+        assert data["reviews"][0]["comment_count"] == 1, (
+            "Проверьте, что кэш детальной страницы со встроенными отзывами "
+            "сбрасывается при добавлении комментария."
+        )
+        assert "reviews" not in client.get(f"/api/v1/titles/{title.id}/").json()
+
+    def test_22_background_cascade_delete(
+        self, admin_client, admin, user, settings
+    ):
+        settings.CASCADE_DELETE_ASYNC_THRESHOLD = 0
+        settings.CASCADE_DELETE_BATCH_SIZE = 2
+        settings.CASCADE_DELETE_EAGER = True
+        title, other = create_catalog(2)
+        for author in (admin, user):
+            review = Review.objects.create(
+                title=title, author=author, text="отзыв", score=5
+            )
+            review.comment.create(author=user, text="комментарий")
+        kept = Review.objects.create(
+            title=other, author=user, text="отзыв", score=4
+        )
+        kept.comment.create(author=admin, text="комментарий")
+
+        with CaptureQueriesContext(connection) as context:
+            response = admin_client.delete(f"/api/v1/titles/{title.id}/")
+        assert response.status_code == 202, (
+            "Проверьте, что удаление произведения с большим числом отзывов "
+            "возвращает ответ со статусом 202."
+        )
+        assert not Title.objects.filter(pk=title.id).exists()
+        assert not Review.objects.filter(title=title.id).exists()
+        assert Review.objects.filter(pk=kept.id).exists()
+        assert not [
+            query["sql"] for query in context.captured_queries
+            if query["sql"].startswith("UPDATE")
+            and ("score_sum" in query["sql"]
+                 or "comment_count" in query["sql"])
+        ], (
+            "Проверьте, что при удалении скрытого произведения его рейтинг "
+            "и счётчики не пересчитываются по каждому отзыву."
+        )
+
+    def test_22_01_background_task_errors_logged(self, caplog):
+        def failing_task(title_id):
+            raise RuntimeError("database is locked")
+
+        run(failing_task, 1)
+        assert "failing_task" in caplog.text, (
+            "Проверьте, что ошибка фоновой задачи записывается в лог."
+        )
+
+    def test_23_hidden_title_purged_by_command(self, admin_client, admin):
+        title, other = create_catalog(2)
+        Review.objects.create(title=title, author=admin, text="отзыв", score=5)
+        Title.objects.filter(pk=title.id).update(is_hidden=True)
+        url = f"/api/v1/titles/{title.id}/"
+        assert admin_client.get(url).status_code == 404
+        assert admin_client.get(f"{url}reviews/").status_code == 404
+        ids = [item["id"] for item in admin_client.get(
+            "/api/v1/titles/"
+        ).json()["results"]]
+        assert ids == [other.id], (
+            "Проверьте, что произведение, ожидающее удаления, скрыто из "
+            "каталога."
+        )
+        call_command("purge_hidden")
+        assert not Title.objects.filter(pk=title.id).exists(), (
+            "Проверьте, что команда `purge_hidden` дочищает скрытые "
+            "произведения."
+        )
+        assert not Review.objects.filter(title=title.id).exists()
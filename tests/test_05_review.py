@@ -1,11 +1,18 @@
 from http import HTTPStatus
 
 import pytest
+from django.core.cache import cache
+from django.db import connection
 from django.db.utils import IntegrityError
+from django.test.utils import CaptureQueriesContext
 
+from api.v1.authentication import user_cache
+from reviews.models import Review
 from tests.utils import (
     check_fields,
     check_pagination,
+    count_queries,
+    create_catalog,
     create_reviews,
     create_single_review,
     create_titles,
@@ -367,3 +374,73 @@ class Test05ReviewAPI:
                 f"Проверьте, что DELETE-запрос {role} к чужому отзыву через "
                 f"`{url_template}` удаляет отзыв."
             )
+
+    def test_06_review_post_resolves_title_once(self, user_client):
+        title = create_catalog(1)[0]
+        url = f"/api/v1/titles/{title.id}/reviews/"
+        data = {"text": "отзыв", "score": 5}
+        with CaptureQueriesContext(connection) as context:
+            response = user_client.post(url, data=data)
+        assert response.status_code == 201
+        selects = [
+            query["sql"] for query in context.captured_queries
+            if query["sql"].startswith("SELECT")
+            and 'FROM "reviews_review"' in query["sql"]
+            or query["sql"].startswith('SELECT "reviews_title"."id"')
+        ]
+        assert len(selects) == 1, (
+            "Проверьте, что при создании отзыва произведение загружается "
+            f"один раз, а дубликат не проверяется отдельным запросом: {selects}"
+        )
+        response = user_client.post(url, data=data)
+        assert response.status_code == 400
+        assert response.json() == {
+            "non_field_errors": ["Вы уже писали отзыв к этому произведению"]
+        }
+
+    def test_07_reviews_constant_queries(
+        self, admin_client, django_user_model
+    ):
+        title = create_catalog(1)[0]
+        for idx in range(6):
+            author = django_user_model.objects.create_user(
+                username=f"author{idx}", email=f"author{idx}@yamdb.fake"
+            )
+            Review.objects.create(
+                title=title, author=author, text="отзыв", score=5
+            )
+        url = f"/api/v1/titles/{title.id}/reviews/"
+        one = count_queries(admin_client, f"{url}?limit=1")
+        cache.clear()
+        user_cache.clear()
+        many = count_queries(admin_client, f"{url}?limit=6")
+        assert one == many, (
+            f"Проверьте, что количество SQL-запросов при GET-запросе к "
+            f"`{url}` не зависит от размера страницы."
+        )
+
+    def test_08_reviews_can_edit_flags(
+        self, client, admin, user, moderator, user_client, moderator_client
+    ):
+        title = create_catalog(1)[0]
+        own = Review.objects.create(
+            title=title, author=user, text="отзыв", score=5
+        )
+        other = Review.objects.create(
+            title=title, author=admin, text="отзыв", score=7
+        )
+        url = f"/api/v1/titles/{title.id}/reviews/"
+
+        def flags(api_client):
+            return {
+                item["id"]: item["can_edit"]
+                for item in api_client.get(url).json()["results"]
+            }
+
+        assert flags(user_client) == {own.id: True, other.id: False}, (
+            "Проверьте, что `can_edit` отмечает только отзывы автора."
+        )
+        assert flags(moderator_client) == {own.id: True, other.id: True}
+        assert flags(client) == {own.id: False, other.id: False}
+        response = user_client.patch(f"{url}{other.id}/", data={"text": "x"})
+        assert response.status_code == 403
@@ -1,10 +1,16 @@
 from http import HTTPStatus
 
 import pytest
+from django.core.cache import cache
+from django.core.management import call_command
 
+from api.v1.authentication import user_cache
+from reviews.models import Review, Title
 from tests.utils import (
     check_fields,
     check_pagination,
+    count_queries,
+    create_catalog,
     create_comments,
     create_reviews,
     create_single_comment,
@@ -388,3 +394,86 @@ class Test06CommentAPI:
             "Проверьте, что DELETE-запрос неавторизованного пользователя к "
             f"`{url}` возвращает ответ со статусом 401."
         )
+
+    def test_07_comment_counters_maintained(self, admin, user):
+        title = create_catalog(1)[0]
+        review = Review.objects.create(
+            title=title, author=admin, text="отзыв", score=5
+        )
+        comment = review.comment.create(author=admin, text="комментарий")
+        review.comment.create(author=user, text="комментарий")
+        review.comment.create(author=user, text="комментарий")
+        review.refresh_from_db()
+        assert review.comment_count == 3, (
+            "Проверьте, что счётчик комментариев растёт при их создании."
+        )
+        comment.text = "исправлено"
+        comment.save()
+        review.text = "исправлено"
+        review.comment_count = 0
+        review.save()
+        review.refresh_from_db()
+        assert review.comment_count == 3, (
+            "Проверьте, что редактирование комментария и сохранение "
+            "устаревшего отзыва не меняют счётчик."
+        )
+        user.delete()
+        review.refresh_from_db()
+        assert review.comment_count == 1, (
+            "Проверьте, что счётчик уменьшается при каскадном удалении "
+            "комментариев пользователя."
+        )
+
+        Review.objects.update(comment_count=10)
+        Title.objects.update(review_count=5, score_sum=0, rating=None)
+        call_command("reconcile_counters")
+        review.refresh_from_db()
+        title.refresh_from_db()
+        assert (review.comment_count, title.review_count, title.rating) == (
+            1, 1, 5
+        ), "Проверьте, что команда `reconcile_counters` пересчитывает счётчики."
+
+    def test_08_comments_constant_queries(
+        self, admin_client, admin, django_user_model
+    ):
+        title = create_catalog(1)[0]
+        review = Review.objects.create(
+            title=title, author=admin, text="отзыв", score=5
+        )
+        for idx in range(6):
+            author = django_user_model.objects.create_user(
+                username=f"author{idx}", email=f"author{idx}@yamdb.fake"
+            )
+            review.comment.create(author=author, text="комментарий")
+        url = f"/api/v1/titles/{title.id}/reviews/{review.id}/comments/"
+        one = count_queries(admin_client, f"{url}?limit=1")
+        cache.clear()
+        user_cache.clear()
+        many = count_queries(admin_client, f"{url}?limit=6")
+        assert one == many, (
+            f"Проверьте, что количество SQL-запросов при GET-запросе к "
+            f"`{url}` не зависит от размера страницы."
+        )
+
+    def test_09_comments_can_edit_flags(
+        self, client, admin, user, moderator_client, user_client
+    ):
+        title = create_catalog(1)[0]
+        review = Review.objects.create(
+            title=title, author=admin, text="отзыв", score=5
+        )
+        own = review.comment.create(author=user, text="комментарий")
+        other = review.comment.create(author=admin, text="комментарий")
+        url = f"/api/v1/titles/{title.id}/reviews/{review.id}/comments/"
+
+        def flags(api_client):
+            return {
+                item["id"]: item["can_edit"]
+                for item in api_client.get(url).json()["results"]
+            }
+
+        assert flags(user_client) == {own.id: True, other.id: False}, (
+            "Проверьте, что `can_edit` отмечает только комментарии автора."
+        )
+        assert flags(moderator_client) == {own.id: True, other.id: True}
+        assert flags(client) == {own.id: False, other.id: False}
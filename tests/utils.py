@@ -1,5 +1,10 @@
 from http import HTTPStatus
 
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+
+from reviews.models import Category, Genre, Title
+
 
 check_name_and_slug_patterns = (
     (
@@ -292,3 +297,30 @@ def check_fields(obj_type, url_pattern, obj, expected_data, detail=False):
         f"данные {obj_types[obj_type]}{results_in_msg}. Поле `id` не "
         "найдено или не является целым числом."
     )
+
+
+def count_queries(client, url):
+    with CaptureQueriesContext(connection) as context:
+        response = client.get(url)
+    assert response.status_code == HTTPStatus.OK, (
+        f"Проверьте, что GET-запрос к `{url}` возвращает ответ со статусом 200."
+    )
+    return len(context.captured_queries)
+
+
+def create_catalog(size):
+    category = Category.objects.create(name="Фильм", slug="film")
+    genres = [
+        Genre.objects.create(name="Драма", slug="drama"),
+        Genre.objects.create(name="Комедия", slug="comedy"),
+    ]
+    titles = []
+    for idx in range(size):
+        title = Title.objects.create(
+            name=f"Произведение {idx}", year=2000 + idx,
+            description="описание", category=category,
+        )
+        title.genre.set(genres)
+        titles.append(title)
+    return titles
+